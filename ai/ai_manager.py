@@ -1,56 +1,245 @@
+import asyncio
+import enum
 import logging
 import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
 
-from audio.gpu_setup import setup_windows_cuda_paths
-from audio.transcriber import Transcriber
-from ai.engine.analyst import StructureAnalyst
-from storage.memory import StorageMind
+
+class ServiceState(enum.Enum):
+    PENDING = "pending"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ServiceNotReady(Exception):
+    pass
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+class _ServiceSlot:
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.state = ServiceState.PENDING
+        self.instance: Any = None
+        self.error: Optional[BaseException] = None
+        self.load_seconds: Optional[float] = None
+        self.done = threading.Event()
+        self.callbacks: List[Callable[[Any], None]] = []
 
 
 class AIContainer:
     """
-    Simple dependency container holding all AI services.
+    Dependency container holding all AI services.
+
+    Services are built in background threads after start(), so the bot can
+    log in and record while models load. Callers either check is_ready()
+    or block in wait() until their dependency is available.
     """
 
-    def __init__(self, transcriber, analyst, memory):
-        self.transcriber = transcriber
-        self.analyst = analyst
-        self.memory = memory
+    def __init__(self, factories: Dict[str, Callable[[], Any]]):
+        self._slots = {name: _ServiceSlot(name, factory) for name, factory in factories.items()}
+        self._started = False
+        self._lock = threading.Lock()
+        self._created_at = time.monotonic()
+
+    # ---------------- LOADING ----------------
+
+    def start(self) -> None:
+        """
+        Starts loading every service in the background. Idempotent.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        logging.info("⏳ Loading AI services in the background...")
+
+        for slot in self._slots.values():
+            threading.Thread(
+                target=self._load, args=(slot,), name=f"load-{slot.name}", daemon=True
+            ).start()
+
+    def _load(self, slot: _ServiceSlot) -> None:
+        slot.state = ServiceState.LOADING
+        start = time.monotonic()
+
+        try:
+            instance = slot.factory()
+        except BaseException as e:
+            slot.error = e
+            logging.exception(f"❌ Failed to load {slot.name}: {e}")
+
+        slot.load_seconds = time.monotonic() - start
+
+        if slot.error is None:
+            slot.instance = instance
+            slot.state = ServiceState.READY
+            logging.info(
+                f"✅ {slot.name} ready in {slot.load_seconds:.1f}s "
+                f"({time.monotonic() - self._created_at:.1f}s since startup)"
+            )
+        else:
+            slot.state = ServiceState.FAILED
+
+        # when_ready callbacks run before waiters are released
+        while True:
+            with self._lock:
+                callbacks, slot.callbacks = slot.callbacks, []
+                if not callbacks:
+                    slot.done.set()
+                    break
+
+            if slot.state is ServiceState.READY:
+                for callback in callbacks:
+                    self._run_callback(slot, callback)
+
+        if all(s.done.is_set() for s in self._slots.values()):
+            logging.info(f"✅ AI services settled: {self.status()}")
+
+    def when_ready(self, name: str, callback: Callable[[Any], None]) -> None:
+        """
+        Calls `callback(service)` once `name` has loaded (right away if it
+        already has). Not called if loading fails.
+        """
+        slot = self._slots[name]
+
+        with self._lock:
+            if not slot.done.is_set():
+                slot.callbacks.append(callback)
+                return
+
+        if slot.state is ServiceState.READY:
+            self._run_callback(slot, callback)
+
+    @staticmethod
+    def _run_callback(slot: _ServiceSlot, callback: Callable[[Any], None]) -> None:
+        try:
+            callback(slot.instance)
+        except Exception as e:
+            logging.error(f"Callback for {slot.name} failed: {e}")
+
+    # ---------------- ACCESS ----------------
+
+    def is_ready(self, *names: str) -> bool:
+        return all(self._slots[name].state is ServiceState.READY for name in names)
+
+    def status(self) -> Dict[str, str]:
+        return {name: slot.state.value for name, slot in self._slots.items()}
+
+    def get(self, name: str) -> Any:
+        """
+        Returns a loaded service or raises ServiceNotReady / ServiceUnavailable.
+        """
+        slot = self._slots[name]
+
+        if slot.state is ServiceState.READY:
+            return slot.instance
+        if slot.state is ServiceState.FAILED:
+            raise ServiceUnavailable(f"{name} failed to load: {slot.error}")
+        raise ServiceNotReady(f"{name} is still loading")
+
+    def wait(
+            self,
+            name: str,
+            timeout: Optional[float] = None,
+            cancel_event: Optional[threading.Event] = None
+    ) -> Any:
+        """
+        Blocks until `name` is loaded. Returns None if `cancel_event` fires first.
+        """
+        slot = self._slots[name]
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while not slot.done.wait(0.5):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                raise ServiceNotReady(f"{name} is still loading")
+
+        return self.get(name)
+
+    async def wait_async(self, name: str) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.wait, name)
+
+    @property
+    def transcriber(self):
+        return self.get("transcriber")
+
+    @property
+    def analyst(self):
+        return self.get("analyst")
+
+    @property
+    def memory(self):
+        return self.get("memory")
+
+
+# ---------------- FACTORIES ----------------
+
+def _local_transcriber():
+    from audio.gpu_setup import setup_windows_cuda_paths
 
+    # Important: configure CUDA paths first
+    setup_windows_cuda_paths()
 
-def initialize_ai() -> AIContainer:
-    """
-    Initializes all AI-related services once at startup.
-    """
+    from audio.transcriber import Transcriber, TranscriberConfig
 
-    logging.info("⏳ Initializing AI services...")
+    transcriber_config = TranscriberConfig()
+    if os.getenv("WHISPER_AUTOTUNE", "0") == "1":
+        from audio.autotune import AutotuneConfig, load_or_tune
 
+        transcriber_config = load_or_tune(
+            transcriber_config,
+            AutotuneConfig(
+                profile_path=os.getenv("WHISPER_PROFILE", AutotuneConfig.profile_path),
+                clip_path=os.getenv("WHISPER_AUTOTUNE_CLIP")
+            )
+        )
 
-    ai_mode = os.getenv("AI_MODE", "local")
-    # Important: configure CUDA paths first
+    return Transcriber(transcriber_config)
 
 
-    if ai_mode == "api":
-        from ai.api.transcriber_api import APITranscriber
-        from ai.api.analyst_api import APIAnalyst
+def _local_analyst():
+    from ai.engine.analyst import StructureAnalyst
+    return StructureAnalyst()
 
-        transcriber = APITranscriber()
-        analyst = APIAnalyst()
 
-    else:
-        setup_windows_cuda_paths()
-        from audio.transcriber import Transcriber
-        from ai.engine.analyst import StructureAnalyst
+def _api_transcriber():
+    from ai.api.transcriber_api import APITranscriber
+    return APITranscriber()
+
+
+def _api_analyst():
+    from ai.api.analyst_api import APIAnalyst
+    return APIAnalyst()
+
+
+def _memory():
+    from storage.memory import StorageMind
+    return StorageMind()
 
-        transcriber = Transcriber()
-        analyst = StructureAnalyst()
 
-    memory = StorageMind()
+def initialize_ai() -> AIContainer:
+    """
+    Creates the AI service container. Nothing is loaded until start().
+    """
+    ai_mode = os.getenv("AI_MODE", "local")
+
+    if ai_mode == "api":
+        factories = {"transcriber": _api_transcriber, "analyst": _api_analyst}
+    else:
+        factories = {"transcriber": _local_transcriber, "analyst": _local_analyst}
 
-    logging.info("✅ AI services ready.")
+    factories["memory"] = _memory
 
-    return AIContainer(
-        transcriber=transcriber,
-        analyst=analyst,
-        memory=memory
-    )
+    return AIContainer(factories)
@@ -1,10 +1,18 @@
+import hashlib
 import logging
+import time
+from typing import Callable, List, Optional
+
+from storage.cache import DiskCache
+
 from .config import AnalystConfig
 from .model_loader import ModelLoader
 from .inference import InferenceEngine
 from .chunking import TextChunker
 from .prompts import PromptBuilder
-from .parser import JSONParser
+from .parser import IncrementalJSONReader, JSONParser
+from .pool import ContextPool, auto_pool_size
+from .schema import Analysis, reviews_grammar
 
 
 class StructureAnalyst:
@@ -20,41 +28,208 @@ class StructureAnalyst:
         llm = loader.load()
 
         self.inference = InferenceEngine(llm, self.config )
-        self.chunker = TextChunker(self.config .chunk_size, self.config.overlap)
+
+        map_size = auto_pool_size(self.config)
+        threads = self.config.n_threads or self.config.map_threads_per_worker
+        self.map_pool = ContextPool(
+            self.inference,
+            lambda: InferenceEngine(loader.load(self.config.map_n_ctx, threads), self.config),
+            map_size
+        )
+        self.logger.info(f"Map phase pool size: {map_size}")
+        self.chunker = TextChunker(
+            self.config.chunk_tokens or self._chunk_budget(),
+            self.config.overlap_turns,
+            count_tokens=self.count_tokens
+        )
+        self.logger.info(f"Map chunk budget: {self.chunker.max_tokens} tokens")
         self.parser = JSONParser()
 
+        self.cache = None
+        if self.config.analysis_cache_dir:
+            self.cache = DiskCache(
+                self.config.analysis_cache_dir,
+                max_bytes=self.config.analysis_cache_mb * 1024 * 1024,
+                name="analyses",
+                max_age=self.config.analysis_cache_days * 86400
+            )
+
     # -------- Public API --------
 
-    def smart_summarize(self, text: str) -> dict:
+    def smart_summarize(self, text: str, on_review: Optional[Callable[[dict], None]] = None) -> Analysis:
+        """
+        `on_review` is called with every review as soon as it is generated.
+        """
+        cached = self.cached_analysis(text, on_review)
+        if cached is not None:
+            return cached
+
         if self._is_short(text):
-            return self._analyze(text)
+            result = self._analyze(text, on_review=on_review)
+        else:
+            result = self._map_reduce(text, on_review)
+
+        self.store_analysis(text, result)
+        return result
+
+    def cached_analysis(self, text: str, on_review: Optional[Callable[[dict], None]] = None) -> Optional[Analysis]:
+        """
+        Previously computed analysis of exactly this text, replayed through `on_review`.
+        """
+        if self.cache is None:
+            return None
 
-        return self._map_reduce(text)
+        start = time.time()
+        result = self.cache.get(self._cache_key(text))
+        if result is None:
+            return None
+
+        stats = self.cache.stats
+        self.logger.info(
+            f"📦 Analysis cache hit in {(time.time() - start) * 1000:.1f}ms "
+            f"(hit rate {stats.hit_rate:.0%})"
+        )
+
+        if on_review is not None:
+            for review in result.get("reviews", []):
+                on_review(review)
+
+        return result
+
+    def store_analysis(self, text: str, result: Analysis) -> None:
+        # an empty result is more likely a failed run than a fact worth pinning
+        if self.cache is not None and result.get("reviews"):
+            self.cache.put(self._cache_key(text), result)
+
+    def map_chunks(self, chunks: List[str]) -> List[str]:
+        """
+        Map step: extracts notes from each chunk, in chunk order.
+        """
+        prompts = [PromptBuilder.build_chunk_prompt(chunk) for chunk in chunks]
+        return self.map_pool.map(prompts, self.config.max_tokens_chunk)
+
+    def reduce(self, notes: List[str], on_review: Optional[Callable[[dict], None]] = None) -> Analysis:
+        """
+        Reduce step: final structured analysis over precomputed notes.
+        Notes that do not fit one context are merged level by level first.
+        """
+        return self._analyze("\n".join(self._tree_reduce(notes)), is_notes=True, on_review=on_review)
 
     # -------- Internal --------
 
+    def _cache_key(self, text: str) -> str:
+        c = self.config
+        return DiskCache.key(
+            hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            c.local_model_path or c.filename,
+            (c.temperature, c.max_tokens_standard, c.max_tokens_chunk, c.structured_output),
+            (c.n_ctx, c.map_n_ctx, self.chunker.max_tokens, c.overlap_turns),
+            PromptBuilder.VERSION
+        )
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.inference.llm.tokenize(text.encode("utf-8"), add_bos=False, special=True))
+
+    def _chunk_budget(self) -> int:
+        n_ctx = self.config.map_n_ctx or self.config.n_ctx
+        prompt = self.count_tokens(str(PromptBuilder.build_chunk_prompt("")))
+        return n_ctx - prompt - self.config.max_tokens_chunk - self.config.context_margin
+
     def _is_short(self, text: str) -> bool:
-        return len(text) // 4 < self.config.context_limit
+        prompt = self.count_tokens(str(PromptBuilder.build_main_prompt(text, is_notes=False)))
+        return prompt + self.config.max_tokens_standard + self.config.context_margin <= self.config.n_ctx
 
-    def _map_reduce(self, text: str) -> dict:
-        chunks = self.chunker.split(text)
-        summaries = []
+    def _fits_final(self, notes: List[str]) -> bool:
+        prompt = self.count_tokens(str(PromptBuilder.build_main_prompt("\n".join(notes), is_notes=True)))
+        return prompt + self.config.max_tokens_standard + self.config.context_margin <= self.config.n_ctx
 
-        for chunk in chunks:
-            prompt = PromptBuilder.build_chunk_prompt(chunk)
-            result = self.inference.generate(
-                prompt,
-                self.config.max_tokens_chunk
+    def _merge_budget(self) -> int:
+        n_ctx = self.config.map_n_ctx or self.config.n_ctx
+        prompt = self.count_tokens(str(PromptBuilder.build_merge_prompt("")))
+        return n_ctx - prompt - self.config.max_tokens_chunk - self.config.context_margin
+
+    def _tree_reduce(self, notes: List[str]) -> List[str]:
+        """
+        Merges notes in token-budgeted groups, concurrently per level, until
+        they fit the final prompt. Each level divides the count by the group size.
+        """
+        notes = [n for n in notes if n.strip()]
+        grouper = TextChunker(self._merge_budget(), overlap_turns=0, count_tokens=self.count_tokens)
+
+        for level in range(1, self.config.max_reduce_levels + 1):
+            if self._fits_final(notes):
+                return notes
+
+            groups = grouper.pack(notes)
+            if len(groups) == len(notes):
+                # every note fills a group on its own; merging cannot shrink them
+                break
+
+            start = time.time()
+            prompts = [PromptBuilder.build_merge_prompt("\n".join(notes[a:b])) for a, b in groups]
+            notes = self.map_pool.map(prompts, self.config.max_tokens_chunk)
+
+            self.logger.info(
+                f"🌲 Reduce level {level}: {sum(b - a for a, b in groups)} notes -> "
+                f"{len(notes)} in {time.time() - start:.2f}s"
             )
-            summaries.append(str(result))
 
-        combined = "\n".join(summaries)
-        return self._analyze(combined, is_notes=True)
+        if not self._fits_final(notes):
+            self.logger.warning("Notes still exceed the context after merging; dropping the tail")
+            while len(notes) > 1 and not self._fits_final(notes):
+                notes = notes[:-1]
+
+        return notes
 
-    def _analyze(self, text: str, is_notes: bool = False) -> dict:
+    def _map_reduce(self, text: str, on_review=None) -> Analysis:
+        return self.reduce(self.map_chunks(self.chunker.split(text)), on_review)
+
+    def _analyze(self, text: str, is_notes: bool = False, on_review=None) -> Analysis:
         prompt = PromptBuilder.build_main_prompt(text, is_notes)
+
+        if on_review is not None:
+            return self._analyze_streaming(prompt, on_review)
+
+        if self.config.structured_output:
+            raw, result = self.inference.generate_json(
+                prompt,
+                self.config.max_tokens_standard,
+                reviews_grammar()
+            )
+            if result is not None:
+                return result
+            # truncated object: keep the reviews that closed before the cut
+            return self._salvage(IncrementalJSONReader().feed(raw))
+
         raw = self.inference.generate(
             prompt,
             self.config.max_tokens_standard
         )
         return self.parser.parse(raw)
+
+    def _analyze_streaming(self, prompt, on_review) -> Analysis:
+        grammar = reviews_grammar() if self.config.structured_output else None
+        reader = IncrementalJSONReader()
+        pieces = []
+        streamed = []
+
+        for piece in self.inference.stream(prompt, self.config.max_tokens_standard, grammar):
+            pieces.append(piece)
+            for review in reader.feed(piece):
+                streamed.append(review)
+                try:
+                    on_review(review)
+                except Exception as e:
+                    self.logger.warning(f"Review callback failed: {e}")
+
+        result = self.parser.parse("".join(pieces))
+
+        # cut off by max_tokens: return what the user has already seen
+        if len(result.get("reviews") or []) < len(streamed):
+            return self._salvage(streamed)
+
+        return result
+
+    def _salvage(self, reviews: List[dict]) -> Analysis:
+        self.logger.warning(f"Analysis cut off by max_tokens; keeping {len(reviews)} complete review(s)")
+        return {"reviews": reviews}
@@ -1,26 +1,155 @@
-from typing import List
+import re
+from typing import Callable, List, Optional, Tuple
+
+# session history entries look like "[HH:MM:SS] Name: text"
+TURN_START = re.compile(r"^\[\d{1,2}:\d{2}:\d{2}\] ", re.MULTILINE)
+TURN_HEADER = re.compile(r"^\[\d{1,2}:\d{2}:\d{2}\] [^:\n]*: ")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fallback when no tokenizer is available; pessimistic for Cyrillic.
+    """
+    return len(text) // 2 + 1
 
 
 class TextChunker:
-    def __init__(self, chunk_size: int, overlap: int):
-        if overlap >= chunk_size:
-            raise ValueError("overlap must be smaller than chunk_size")
+    """
+    Packs whole speaker turns into chunks of at most `max_tokens` tokens,
+    counted with `count_tokens` (the model's tokenizer). Consecutive chunks
+    share the last `overlap_turns` turns for context.
+    """
 
-        self.chunk_size = chunk_size
-        self.overlap = overlap
+    def __init__(
+            self,
+            max_tokens: int,
+            overlap_turns: int = 2,
+            count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+
+        self.max_tokens = max_tokens
+        self.overlap_turns = max(overlap_turns, 0)
+        self.count_tokens = count_tokens or estimate_tokens
 
     def split(self, text: str) -> List[str]:
-        chunks = []
+        pieces = self.pieces(text)
+        return ["\n".join(pieces[start:end]) for start, end in self.pack(pieces)]
+
+    def pieces(self, text: str) -> List[str]:
+        """
+        Speaker turns, with turns larger than the budget split up.
+        """
+        pieces = []
+        for turn in self.turns(text):
+            pieces.extend(self._fit(turn))
+        return pieces
+
+    def pack(self, pieces: List[str]) -> List[Tuple[int, int]]:
+        """
+        Greedy (start, end) ranges over `pieces`. Every range but the last
+        is full, i.e. the next piece would not have fitted.
+        """
+        if not pieces:
+            return []
+
+        sizes = [self.count_tokens(piece) + 1 for piece in pieces]  # +1 for the joining newline
+
+        ranges = []
         start = 0
-        text_len = len(text)
 
-        while start < text_len:
-            end = min(start + self.chunk_size, text_len)
-            chunks.append(text[start:end])
+        while start < len(pieces):
+            end, used = start, 0
+            while end < len(pieces) and (end == start or used + sizes[end] <= self.max_tokens):
+                used += sizes[end]
+                end += 1
+
+            ranges.append((start, end))
 
-            if end == text_len:
+            if end == len(pieces):
                 break
 
-            start += self.chunk_size - self.overlap
+            # overlap by whole turns, but never so much that a chunk makes no progress
+            overlap = min(self.overlap_turns, end - start - 1)
+            while overlap and sum(sizes[end - overlap:end]) > self.max_tokens // 2:
+                overlap -= 1
+            start = end - overlap
+
+        return ranges
+
+    @staticmethod
+    def turns(text: str) -> List[str]:
+        """
+        Splits a transcript into speaker turns; continuation lines stay with their turn.
+        Text without timestamps falls back to one turn per line.
+        """
+        starts = [m.start() for m in TURN_START.finditer(text)]
+
+        if not starts:
+            return [line for line in text.splitlines() if line.strip()]
+
+        pieces = []
+        if starts[0] > 0 and text[:starts[0]].strip():
+            pieces.append(text[:starts[0]].strip())
+
+        for begin, end in zip(starts, starts[1:] + [len(text)]):
+            turn = text[begin:end].strip()
+            if turn:
+                pieces.append(turn)
+
+        return pieces
+
+    def _fit(self, turn: str) -> List[str]:
+        """
+        Splits a single turn that alone exceeds the budget at word boundaries.
+        Every piece repeats the turn's "[HH:MM:SS] Name: " header, so the
+        speaker stays attributed. The turn is tokenized once; word sizes are
+        estimated from that and only the resulting pieces are counted again.
+        """
+        total = self.count_tokens(turn)
+        if total < self.max_tokens:
+            return [turn]
+
+        match = TURN_HEADER.match(turn)
+        header = match.group(0) if match else ""
+        body = turn[len(header):]
+
+        header_tokens = self.count_tokens(header) if header else 0
+        per_char = max(total - header_tokens, 1) / max(len(body), 1)
+
+        # pieces must stay below max_tokens, including the joining newline
+        budget = self.max_tokens - 1 - header_tokens
+        if budget <= 0:
+            # header alone does not fit: split the turn as plain text
+            header, body, budget = "", turn, self.max_tokens - 1
+
+        words = body.split(" ")
+
+        groups, current, used = [], [], 0.0
+        for word in words:
+            size = (len(word) + 1) * per_char
+            if current and used + size > budget:
+                groups.append(current)
+                current, used = [], 0.0
+            current.append(word)
+            used += size
+
+        if current:
+            groups.append(current)
+
+        pieces = []
+        for group in groups:
+            pieces.extend(self._checked(header, group))
+        return pieces
+
+    def _checked(self, header: str, words: List[str]) -> List[str]:
+        """
+        `header` + `words` as one piece, halved until each half fits.
+        """
+        piece = header + " ".join(words)
+        if len(words) == 1 or self.count_tokens(piece) < self.max_tokens:
+            return [piece]
 
-        return chunks
+        middle = len(words) // 2
+        return self._checked(header, words[:middle]) + self._checked(header, words[middle:])
@@ -8,9 +8,36 @@ class AnalystConfig:
 
     local_model_path: Optional[str] = None
 
-    context_limit: int = 5000
-    chunk_size: int = 15000
-    overlap: int = 1000
+    # resolved files are recorded here and reused without contacting the hub
+    models_dir: str = "models"
+    manifest_path: str = "models/manifest.json"
+    # never download; fail if the model is not available locally
+    offline: bool = False
+    # pin the expected GGUF digest; checked when a file is first registered
+    model_sha256: Optional[str] = None
+    # re-hash the file on every start instead of trusting size/mtime
+    verify_on_load: bool = False
+
+    # map chunks are packed with whole speaker turns up to this many tokens;
+    # None derives it from the map context size minus prompt and output
+    chunk_tokens: Optional[int] = None
+    overlap_turns: int = 2
+    # tokens kept free for tokenizer boundary effects
+    context_margin: int = 64
+    # merge levels before notes are cut to fit the final prompt
+    max_reduce_levels: int = 6
+
+    # reuse the evaluated KV state of the static instruction prefixes
+    prefix_cache: bool = True
+    prefix_cache_entries: int = 4
+
+    # finished analyses keyed by transcript hash, model, sampling and prompt version
+    analysis_cache_dir: Optional[str] = "analysis_cache"
+    analysis_cache_mb: int = 64
+    analysis_cache_days: float = 30.0
+
+    # constrain the final analysis to the reviews JSON schema (GBNF grammar)
+    structured_output: bool = True
 
     max_tokens_standard: int = 4096
     max_tokens_chunk: int = 1024
@@ -18,3 +45,19 @@ class AnalystConfig:
 
     n_ctx: int = 8192
     n_gpu_layers: int = -1
+
+    # llama.cpp load options
+    use_mmap: bool = True
+    use_mlock: bool = False
+    n_threads: Optional[int] = None
+    n_batch: int = 512
+
+    # map phase: parallel llama.cpp contexts sharing the mmap'd weights;
+    # 0 sizes the pool from cores and available memory
+    map_workers: int = 0
+    map_max_workers: int = 4
+    map_threads_per_worker: int = 4
+    # context size of the extra contexts; None uses n_ctx
+    map_n_ctx: Optional[int] = None
+    # estimated memory per extra context (KV cache + scratch)
+    map_context_mb: int = 1024
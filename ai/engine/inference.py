@@ -1,7 +1,17 @@
+import collections
+import json
+import threading
 import time
 import logging
-from llama_cpp import Llama
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+from llama_cpp import Llama, StoppingCriteriaList
+
+from core.scheduling import JobCancelled
+
 from .config import AnalystConfig
+from .prompts import Prompt
+from .scheduler import current_cancel_event
 
 
 class InferenceEngine:
@@ -9,23 +19,172 @@ class InferenceEngine:
         self.llm = llm
         self.config = config
         self.logger = logging.getLogger(__name__)
+        # a llama.cpp context serves one generation at a time
+        self._lock = threading.Lock()
 
-    def generate(self, prompt: str, max_tokens: int) -> str:
-        start_time = time.time()
+        # instruction prefix -> (tokens, evaluated state) for this context
+        self._prefix_states: "collections.OrderedDict[str, tuple]" = collections.OrderedDict()
 
-        output = self.llm(
-            prompt,
-            max_tokens=max_tokens,
-            temperature=self.config.temperature,
-            stop=["</s>"],
-            echo=False
-        )
+    def generate(
+            self,
+            prompt: Union[str, Prompt],
+            max_tokens: int,
+            grammar: Any = None,
+            cancel_event: Optional[threading.Event] = None
+    ) -> str:
+        """
+        `cancel_event` defaults to the current inference job's; setting it
+        stops sampling at the next token and raises JobCancelled.
+        """
+        cancel_event = cancel_event or current_cancel_event()
+
+        with self._lock:
+            self._check(cancel_event)
+            start_time = time.time()
+
+            prompt = self._prepare(prompt)
+
+            output = self.llm(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=self.config.temperature,
+                stop=["</s>"],
+                echo=False,
+                grammar=grammar,
+                stopping_criteria=self._stopping(cancel_event)
+            )
+
+            self._check(cancel_event)
 
         duration = time.time() - start_time
-        self.logger.info(f"⚡ Inference complete in {duration:.2f}s")
+        tokens = output.get("usage", {}).get("completion_tokens", 0) if isinstance(output, dict) else 0
+        self.logger.info(
+            f"⚡ Inference complete in {duration:.2f}s "
+            f"({tokens} tokens, {tokens / duration if duration else 0:.1f} tok/s)"
+        )
 
         try:
             return output["choices"][0]["text"].strip()
         except Exception:
             self.logger.error("Invalid LLM output format")
             return ""
+
+    def stream(
+            self,
+            prompt: Union[str, Prompt],
+            max_tokens: int,
+            grammar: Any = None,
+            cancel_event: Optional[threading.Event] = None
+    ) -> Iterator[str]:
+        """
+        Yields the completion piece by piece as tokens are sampled.
+        The context stays locked until the iterator is exhausted or closed.
+        """
+        cancel_event = cancel_event or current_cancel_event()
+
+        with self._lock:
+            self._check(cancel_event)
+            start_time = time.time()
+            first_token = None
+            tokens = 0
+
+            chunks = self.llm(
+                self._prepare(prompt),
+                max_tokens=max_tokens,
+                temperature=self.config.temperature,
+                stop=["</s>"],
+                echo=False,
+                grammar=grammar,
+                stream=True,
+                stopping_criteria=self._stopping(cancel_event)
+            )
+
+            try:
+                for chunk in chunks:
+                    text = chunk["choices"][0]["text"]
+                    if not text:
+                        continue
+
+                    if first_token is None:
+                        first_token = time.time() - start_time
+                    tokens += 1
+                    yield text
+
+                self._check(cancel_event)
+            finally:
+                duration = time.time() - start_time
+                decode = duration - (first_token or 0.0)
+                self.logger.info(
+                    f"⚡ Streamed {tokens} tokens in {duration:.2f}s "
+                    f"(first token {first_token or 0.0:.2f}s, {tokens / decode if decode > 0 else 0:.1f} tok/s)"
+                )
+
+    @staticmethod
+    def _stopping(cancel_event: Optional[threading.Event]):
+        if cancel_event is None:
+            return None
+        return StoppingCriteriaList([lambda input_ids, logits: cancel_event.is_set()])
+
+    @staticmethod
+    def _check(cancel_event: Optional[threading.Event]) -> None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise JobCancelled("inference")
+
+    def _prepare(self, prompt: Union[str, Prompt]):
+        if isinstance(prompt, Prompt) and self.config.prefix_cache:
+            return self._restore_prefix(prompt)
+        return str(prompt)
+
+    def generate_json(
+            self,
+            prompt: Union[str, Prompt],
+            max_tokens: int,
+            grammar: Any
+    ) -> Tuple[str, Optional[dict]]:
+        """
+        Grammar-constrained generation. Sampling can only produce text the
+        grammar accepts and stops once the root object closes, so the output
+        is loaded directly. Returns (raw, None) if it was cut off by max_tokens.
+        """
+        raw = self.generate(prompt, max_tokens, grammar=grammar)
+
+        try:
+            return raw, json.loads(raw)
+        except json.JSONDecodeError:
+            self.logger.error(f"Constrained output incomplete ({len(raw)} chars), max_tokens too low?")
+            return raw, None
+
+    # -------- Prefix cache --------
+
+    def _restore_prefix(self, prompt: Prompt) -> List[int]:
+        """
+        Puts the evaluated instruction prefix into the context and returns
+        the full token list. llama-cpp-python only evaluates the tokens past
+        the longest prefix already in the context, i.e. the suffix.
+        """
+        cached = self._prefix_states.get(prompt.prefix)
+
+        if cached is None:
+            tokens = self.llm.tokenize(prompt.prefix.encode("utf-8"), add_bos=True, special=True)
+
+            start = time.time()
+            self.llm.reset()
+            self.llm.eval(tokens)
+            state = self.llm.save_state()
+            self.logger.info(f"🧊 Cached prompt prefix: {len(tokens)} tokens in {time.time() - start:.2f}s")
+
+            self._prefix_states[prompt.prefix] = (tokens, state)
+            while len(self._prefix_states) > self.config.prefix_cache_entries:
+                self._prefix_states.popitem(last=False)
+
+        else:
+            tokens, state = cached
+            self._prefix_states.move_to_end(prompt.prefix)
+
+            # skip the copy when the context still starts with this prefix
+            n = len(tokens)
+            if self.llm.n_tokens < n or list(self.llm.input_ids[:n]) != tokens:
+                self.llm.load_state(state)
+
+        suffix = self.llm.tokenize(prompt.suffix.encode("utf-8"), add_bos=False, special=True)
+        return tokens + suffix
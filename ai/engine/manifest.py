@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class ModelManifest:
+    """
+    On-disk record of resolved model files (path, size, mtime, sha256).
+
+    A file is hashed once when it is registered; later lookups only stat
+    it, so a known model resolves without hashing or any hub call.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    # -------- Public API --------
+
+    def lookup(self, repo_id: str, filename: str, verify_checksum: bool = False) -> Optional[str]:
+        """
+        Returns the recorded path if the file is still there and unchanged.
+        """
+        entry = self._load().get(self._key(repo_id, filename))
+        if not entry:
+            return None
+
+        path = entry["path"]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.logger.warning(f"Manifest entry for {filename} points to a missing file: {path}")
+            return None
+
+        if stat.st_size != entry["size"] or int(stat.st_mtime) != entry["mtime"]:
+            self.logger.warning(f"Model file changed since it was verified: {path}")
+            return None
+
+        if verify_checksum and file_sha256(path) != entry["sha256"]:
+            self.logger.warning(f"Checksum mismatch for {path}")
+            return None
+
+        return path
+
+    def register(self, repo_id: str, filename: str, path: str, sha256: Optional[str] = None) -> dict:
+        """
+        Hashes `path` (unless the digest is given) and records it.
+        """
+        stat = os.stat(path)
+        entry = {
+            "path": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime": int(stat.st_mtime),
+            "sha256": sha256 or file_sha256(path),
+            "verified_at": int(time.time()),
+        }
+
+        with self._lock:
+            models = self._load()
+            models[self._key(repo_id, filename)] = entry
+            self._save(models)
+
+        return entry
+
+    # -------- Internal --------
+
+    @staticmethod
+    def _key(repo_id: str, filename: str) -> str:
+        return f"{repo_id}/{filename}"
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("models", {})
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable model manifest {self.path}: {e}")
+            return {}
+
+    def _save(self, models: Dict[str, dict]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"models": models}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def file_sha256(path: str, block_size: int = 8 * 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
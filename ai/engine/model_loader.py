@@ -1,35 +1,116 @@
 import logging
-from huggingface_hub import hf_hub_download
+import os
+import time
+from typing import Optional
+
 from llama_cpp import Llama
 from .config import AnalystConfig
+from .manifest import ModelManifest, file_sha256
 
 
 class ModelLoader:
     def __init__(self, config: AnalystConfig):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.manifest = ModelManifest(config.manifest_path)
+        self._model_path: Optional[str] = None
 
-    def load(self) -> Llama:
+    def load(self, n_ctx: Optional[int] = None, n_threads: Optional[int] = None) -> Llama:
+        """
+        Creates a llama.cpp context. Further calls reuse the resolved file,
+        so extra contexts share the mmap'd weights.
+        """
         try:
-            self.logger.info(f"Downloading/Loading model: {self.config.filename}")
-
-            if self.config.local_model_path:
-                model_path = self.config.local_model_path
-            else:
-                model_path = hf_hub_download(
-                    repo_id=self.config.repo_id,
-                    filename=self.config.filename
-                )
+            if self._model_path is None:
+                self._model_path = self.resolve()
+            model_path = self._model_path
 
             self.logger.info(f"Initializing Llama from: {model_path}")
+            start = time.time()
 
-            return Llama(
+            llm = Llama(
                 model_path=model_path,
                 n_gpu_layers=self.config.n_gpu_layers,
-                n_ctx=self.config.n_ctx,
+                n_ctx=n_ctx or self.config.n_ctx,
+                n_batch=self.config.n_batch,
+                n_threads=n_threads or self.config.n_threads,
+                use_mmap=self.config.use_mmap,
+                use_mlock=self.config.use_mlock,
                 verbose=False
             )
 
+            self.logger.info(f"Llama initialized in {time.time() - start:.2f}s")
+            return llm
+
         except Exception as e:
             self.logger.error(f"Model loading failed: {e}")
             raise
+
+    def resolve(self) -> str:
+        """
+        Finds the GGUF file: explicit path, then the manifest, then models_dir,
+        then the default Hugging Face cache, and only then a download (unless offline).
+        """
+        if self.config.local_model_path:
+            return self.config.local_model_path
+
+        repo_id, filename = self.config.repo_id, self.config.filename
+
+        path = self.manifest.lookup(repo_id, filename, verify_checksum=self.config.verify_on_load)
+        if path:
+            self.logger.info(f"Model resolved from manifest: {filename}")
+            return path
+
+        path = self._hub_path(local_files_only=True) or self._hf_cache_path()
+
+        if path is None:
+            if self.config.offline or os.getenv("HF_HUB_OFFLINE") == "1":
+                raise FileNotFoundError(
+                    f"{filename} is not available locally and offline mode is enabled"
+                )
+
+            self.logger.info(f"Downloading model: {filename}")
+            path = self._hub_path(local_files_only=False)
+
+        self._register(path)
+        return path
+
+    def _hub_path(self, local_files_only: bool):
+        from huggingface_hub import hf_hub_download
+
+        try:
+            return hf_hub_download(
+                repo_id=self.config.repo_id,
+                filename=self.config.filename,
+                local_dir=self.config.models_dir,
+                local_files_only=local_files_only
+            )
+        except Exception as e:
+            if not local_files_only:
+                raise
+            self.logger.info(f"Model not in local cache: {e}")
+            return None
+
+    def _hf_cache_path(self) -> Optional[str]:
+        """
+        The file in the default Hugging Face cache, where it was downloaded
+        before models_dir existed; reused instead of downloading it again.
+        """
+        from huggingface_hub import try_to_load_from_cache
+
+        path = try_to_load_from_cache(repo_id=self.config.repo_id, filename=self.config.filename)
+        if not isinstance(path, str) or not os.path.exists(path):
+            return None
+
+        self.logger.info(f"Model found in the Hugging Face cache: {path}")
+        return path
+
+    def _register(self, path: str) -> None:
+        self.logger.info(f"Verifying {path} (first use)...")
+        digest = file_sha256(path)
+
+        expected = self.config.model_sha256
+        if expected and digest != expected.lower():
+            raise ValueError(f"Checksum mismatch for {path}: {digest} != {expected}")
+
+        self.manifest.register(self.config.repo_id, self.config.filename, path, sha256=digest)
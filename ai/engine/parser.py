@@ -1,6 +1,7 @@
 import json
 import re
 import logging
+from typing import List
 
 
 class JSONParser:
@@ -35,3 +36,55 @@ class JSONParser:
             return text[first:last + 1]
 
         return text
+
+
+class IncrementalJSONReader:
+    """
+    Consumes streamed JSON text and returns each object of the root-level
+    array (e.g. every review) as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+        self._pos = 0
+
+    def feed(self, text: str) -> List[dict]:
+        completed = []
+
+        for ch in text:
+            self._buffer.append(ch)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+
+            elif ch == '"':
+                self._in_string = True
+
+            elif ch in "{[":
+                if ch == "{" and self._stack == ["{", "["]:
+                    self._item_start = self._pos
+                self._stack.append(ch)
+
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+
+                if ch == "}" and self._stack == ["{", "["] and self._item_start is not None:
+                    try:
+                        completed.append(json.loads("".join(self._buffer[self._item_start:])))
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = None
+
+            self._pos += 1
+
+        return completed
@@ -0,0 +1,130 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .config import AnalystConfig
+from .inference import InferenceEngine
+from .scheduler import current_cancel_event
+
+
+@dataclass
+class MapResult:
+    index: int
+    text: str
+    seconds: float
+    worker: int
+
+
+def auto_pool_size(config: AnalystConfig) -> int:
+    """
+    Contexts the host can run side by side: bounded by cores (threads per
+    context) and by available memory (per-context KV cache/scratch estimate).
+    The weights themselves are mmap'd once and shared.
+    """
+    if config.map_workers > 0:
+        return config.map_workers
+
+    # every context would hold its own copy of the offloaded layers in VRAM
+    if config.n_gpu_layers != 0 and _gpu_offload_supported():
+        return 1
+
+    cores = os.cpu_count() or 1
+    by_cores = max(1, cores // max(config.map_threads_per_worker, 1))
+
+    by_memory = by_cores
+    available = _available_memory_mb()
+    if available is not None:
+        by_memory = max(1, int(available // max(config.map_context_mb, 1)))
+
+    return max(1, min(by_cores, by_memory, config.map_max_workers))
+
+
+def _available_memory_mb() -> Optional[float]:
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _gpu_offload_supported() -> bool:
+    try:
+        import llama_cpp
+        return bool(llama_cpp.llama_supports_gpu_offload())
+    except Exception:
+        return False
+
+
+class ContextPool:
+    """
+    Fixed set of InferenceEngines over separate llama.cpp contexts.
+    Extra contexts are created on first use and kept for later calls.
+    """
+
+    def __init__(self, primary: InferenceEngine, factory: Callable[[], InferenceEngine], size: int):
+        self.size = max(1, size)
+        self.logger = logging.getLogger(__name__)
+
+        self._factory = factory
+        self._engines = [primary]
+        self._idle: "queue.Queue[int]" = queue.Queue()
+        self._idle.put(0)
+        self._grow_lock = threading.Lock()
+
+    def map(self, prompts: List[str], max_tokens: int) -> List[str]:
+        """
+        Generates all prompts concurrently; output order matches `prompts`.
+        """
+        if not prompts:
+            return []
+
+        self._ensure(min(self.size, len(prompts)))
+        start = time.time()
+
+        # pool threads do not inherit the calling job's cancel event
+        cancel_event = current_cancel_event()
+
+        def run(index: int) -> MapResult:
+            worker = self._idle.get()
+            try:
+                t0 = time.time()
+                text = self._engines[worker].generate(prompts[index], max_tokens, cancel_event=cancel_event)
+                return MapResult(index, text, time.time() - t0, worker)
+            finally:
+                self._idle.put(worker)
+
+        with ThreadPoolExecutor(max_workers=len(self._engines), thread_name_prefix="llm-map") as pool:
+            results = list(pool.map(run, range(len(prompts))))
+
+        for r in results:
+            self.logger.info(
+                f"🧩 Chunk {r.index + 1}/{len(prompts)} on context {r.worker}: {r.seconds:.2f}s"
+            )
+
+        total = time.time() - start
+        busy = sum(r.seconds for r in results)
+        self.logger.info(
+            f"🧩 Map phase: {len(prompts)} chunks on {len(self._engines)} contexts in {total:.2f}s "
+            f"(sequential would be ~{busy:.2f}s)"
+        )
+
+        return [r.text for r in results]
+
+    def _ensure(self, count: int):
+        with self._grow_lock:
+            while len(self._engines) < count:
+                try:
+                    engine = self._factory()
+                except Exception as e:
+                    self.logger.warning(f"Could not create extra LLM context, continuing with "
+                                        f"{len(self._engines)}: {e}")
+                    self.size = len(self._engines)
+                    return
+
+                self._engines.append(engine)
+                self._idle.put(len(self._engines) - 1)
+                self.logger.info(f"Created LLM context {len(self._engines)}/{self.size}")
@@ -1,8 +1,25 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """
+    Prompt split into the static instruction prefix, whose evaluated
+    KV state is cached per context, and the input-specific suffix.
+    """
+    prefix: str
+    suffix: str
+
+    def __str__(self) -> str:
+        return self.prefix + self.suffix
+
+
 class PromptBuilder:
 
-    @staticmethod
-    def build_chunk_prompt(chunk: str) -> str:
-        return f"""[INST]
+    # bump on any prompt text change; part of the analysis cache key
+    VERSION = 1
+
+    CHUNK_PREFIX = """[INST]
                 АНАЛІЗ СЕГМЕНТУ (Raw Data Extraction).
                 
                 1. Знайди всі згадки медіа (фільми, ігри, книги).
@@ -15,11 +32,34 @@ class PromptBuilder:
                 Якщо нічого немає — напиши "ПУСТО".
                 
                 ТЕКСТ:
-                {chunk}
-                [/INST]"""
+"""
+
+    @staticmethod
+    def build_chunk_prompt(chunk: str) -> Prompt:
+        return Prompt(PromptBuilder.CHUNK_PREFIX, f"""                {chunk}
+                [/INST]""")
+
+    MERGE_PREFIX = """[INST]
+                ОБ'ЄДНАННЯ НОТАТОК.
+                
+                Нижче — нотатки з кількох послідовних сегментів обговорення.
+                1. Об'єднай записи про один і той самий твір від одного спікера.
+                2. Прибери повтори, але збережи всі твори, оцінки, аргументи та спікерів.
+                3. Нічого не вигадуй.
+                
+                ФОРМАТ:
+                - Спікер: [Ім'я] | Твір: [Назва] | Оцінка: [Число/Фраза] | Думка: [Аргументи]
+                
+                НОТАТКИ:
+"""
+
+    @staticmethod
+    def build_merge_prompt(notes: str) -> Prompt:
+        return Prompt(PromptBuilder.MERGE_PREFIX, f"""                {notes}
+                [/INST]""")
 
     @staticmethod
-    def build_main_prompt(text: str, is_notes: bool) -> str:
+    def main_prefix(is_notes: bool) -> str:
         input_desc = (
             "Це попередньо зібрані нотатки."
             if is_notes
@@ -47,5 +87,9 @@ class PromptBuilder:
                     }}
                     
                     ТЕКСТ:
-                    {text}
-                    [/INST]"""
+"""
+
+    @staticmethod
+    def build_main_prompt(text: str, is_notes: bool) -> Prompt:
+        return Prompt(PromptBuilder.main_prefix(is_notes), f"""                    {text}
+                    [/INST]""")
@@ -0,0 +1,74 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from core.scheduling import FairScheduler, Job, Priority
+
+_current = threading.local()
+
+
+def current_cancel_event() -> Optional[threading.Event]:
+    """
+    Cancel event of the inference job running on this thread, if any.
+    """
+    job = getattr(_current, "job", None)
+    return job.cancel_event if job is not None else None
+
+
+@dataclass
+class InferenceSchedulerConfig:
+    # LLM jobs run one at a time; each may still fan out over the context pool
+    workers: int = 1
+    # admission control: a submission is rejected when this many jobs of its
+    # priority or higher are queued, so background maps cannot crowd out /summarize
+    max_queue: int = 8
+
+
+class InferenceScheduler:
+    """
+    Cross-guild queue in front of the LLM.
+
+    Jobs run strictly by priority class (interactive /summarize before
+    background map work) and round robin between guilds inside a class.
+    Cancelling a running job stops its generation at the next token.
+    """
+
+    def __init__(self, config: Optional[InferenceSchedulerConfig] = None):
+        self.config = config or InferenceSchedulerConfig()
+        self.logger = logging.getLogger(__name__)
+        self._pool = FairScheduler("llm", workers=self.config.workers, max_queue=self.config.max_queue)
+
+    def submit(
+            self,
+            guild_id: int,
+            fn: Callable[[Job], Any],
+            priority: Priority = Priority.INTERACTIVE,
+            label: str = "llm"
+    ) -> Job:
+        """
+        Raises QueueFull when max_queue jobs at `priority` or above are queued.
+        """
+        def run(job: Job):
+            _current.job = job
+            try:
+                return fn(job)
+            finally:
+                _current.job = None
+
+        return self._pool.submit(guild_id, run, priority, label)
+
+    def position(self, job: Job) -> Optional[int]:
+        return self._pool.position(job)
+
+    def cancel(self, job: Job) -> None:
+        self._pool.cancel(job)
+
+    def cancel_guild(self, guild_id: int) -> int:
+        return self._pool.cancel_guild(guild_id)
+
+    def pending(self, max_priority: Priority = Priority.IDLE) -> int:
+        return self._pool.pending(max_priority)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
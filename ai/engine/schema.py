@@ -0,0 +1,61 @@
+import json
+import threading
+from typing import List, Optional, TypedDict
+
+# mirrors the JSON example in PromptBuilder.main_prefix
+REVIEWS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reviews": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "type": {"type": "string", "enum": ["book", "movie", "game", "series"]},
+                    "sentiment": {"type": "string", "enum": ["positive", "negative", "mixed"]},
+                    "arguments": {"type": "array", "items": {"type": "string"}},
+                    "mark": {"anyOf": [{"type": "number"}, {"type": "null"}]},
+                    "is_inferred_score": {"type": "boolean"},
+                    "speaker": {"type": "string"},
+                },
+                "required": [
+                    "title", "type", "sentiment", "arguments",
+                    "mark", "is_inferred_score", "speaker"
+                ],
+            },
+        },
+    },
+    "required": ["reviews"],
+}
+
+
+class Review(TypedDict):
+    title: str
+    type: str
+    sentiment: str
+    arguments: List[str]
+    mark: Optional[float]
+    is_inferred_score: bool
+    speaker: str
+
+
+class Analysis(TypedDict):
+    reviews: List[Review]
+
+
+_grammar = None
+_grammar_lock = threading.Lock()
+
+
+def reviews_grammar():
+    """
+    GBNF grammar for REVIEWS_SCHEMA, compiled once.
+    """
+    global _grammar
+
+    with _grammar_lock:
+        if _grammar is None:
+            from llama_cpp import LlamaGrammar
+            _grammar = LlamaGrammar.from_json_schema(json.dumps(REVIEWS_SCHEMA), verbose=False)
+        return _grammar
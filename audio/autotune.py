@@ -0,0 +1,311 @@
+"""
+Per-host tuning of Whisper compute type, beam size and thread layout.
+
+The first start on a machine benchmarks candidate settings on a short
+clip and stores the fastest one that stays within an accuracy floor of
+the baseline configuration. Later starts reuse the stored profile.
+
+Usage:
+    python -m audio.autotune --clip sample.wav [--force]
+"""
+import argparse
+import glob
+import itertools
+import json
+import logging
+import os
+import platform
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence
+
+import torch
+from faster_whisper import decode_audio
+
+from .transcriber import Transcriber, TranscriberConfig
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------- CONFIG ----------------------
+
+@dataclass
+class AutotuneConfig:
+    profile_path: str = "profiles/whisper_profile.json"
+    # benchmark clip (speech, ideally in the configured language); falls back to
+    # the newest archived recording. No clip is bundled: tuning is skipped until one exists
+    clip_path: Optional[str] = None
+    recordings_dir: str = "recordings"
+    clip_seconds: float = 30.0
+
+    beam_sizes: Sequence[int] = (1, 2, 5)
+    worker_counts: Sequence[int] = (1, 2, 4)
+    # None picks the candidates for the detected device
+    compute_types: Optional[Sequence[str]] = None
+
+    # max word error rate against the baseline configuration's transcript
+    max_wer: float = 0.1
+
+
+COMPUTE_TYPES = {
+    "cpu": ("int8", "int8_float32", "float32"),
+    "cuda": ("int8_float16", "float16", "int8"),
+}
+
+
+# ---------------------- PROFILE ----------------------
+
+def hardware_key(device: str) -> str:
+    """
+    Identifies the host so each node type gets its own profile entry.
+    """
+    parts = [platform.machine(), platform.processor() or "cpu", f"{os.cpu_count()}cores", device]
+    if device == "cuda" and torch.cuda.is_available():
+        parts.append(torch.cuda.get_device_name(0))
+    return "|".join(parts)
+
+
+def load_profile(path: str) -> Dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable Whisper profile {path}: {e}")
+        return {}
+
+
+def save_profile(path: str, key: str, entry: dict) -> None:
+    profiles = load_profile(path)
+    profiles[key] = entry
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp, path)
+
+
+def profile_matches(entry: dict, config: TranscriberConfig) -> bool:
+    """
+    True if `entry` was tuned for the models and batching `config` runs.
+    """
+    return (
+        entry.get("model_size") == config.model_size
+        and entry.get("fast_model_size") == config.fast_model_size
+        and entry.get("batch_size") == config.batch_size
+    )
+
+
+def apply_profile(config: TranscriberConfig, entry: dict) -> TranscriberConfig:
+    return replace(
+        config,
+        compute_type=entry["compute_type"],
+        beam_size=entry["beam_size"],
+        num_workers=entry["num_workers"],
+        cpu_threads=entry["cpu_threads"]
+    )
+
+
+# ---------------------- ACCURACY ----------------------
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Word-level Levenshtein distance normalised by the reference length.
+    """
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+
+    return previous[-1] / len(ref)
+
+
+# ---------------------- TUNING ----------------------
+
+def find_clip(config: AutotuneConfig) -> Optional[str]:
+    """
+    The configured clip, else the newest recording; None (with a warning) if neither exists.
+    """
+    if config.clip_path:
+        if os.path.exists(config.clip_path):
+            return config.clip_path
+
+        logger.warning(f"Whisper autotune clip {config.clip_path} not found")
+        return None
+
+    candidates = glob.glob(os.path.join(config.recordings_dir, "**", "*.wav"), recursive=True)
+    if candidates:
+        return max(candidates, key=os.path.getmtime)
+
+    logger.warning(f"No recordings in {config.recordings_dir}/ to benchmark Whisper settings on")
+    return None
+
+
+def _candidate(base: TranscriberConfig, device: str, compute_type: str, workers: int, threads: int) -> TranscriberConfig:
+    # everything else (batching, fast tier, routing) stays as the bot runs it
+    return replace(
+        base,
+        device=device,
+        compute_type=compute_type,
+        num_workers=workers,
+        cpu_threads=threads,
+        cache_dir=None
+    )
+
+
+def _set_beam_size(transcriber: Transcriber, beam_size: int) -> None:
+    transcriber.config.beam_size = beam_size
+    transcriber.main_tier.beam_size = beam_size
+
+
+def tune(base: TranscriberConfig, config: AutotuneConfig, clip: str) -> Optional[dict]:
+    """
+    Benchmarks all candidates on `clip` and returns the fastest one within
+    `max_wer` of the baseline transcript, or None if none qualifies.
+    Candidates run through Transcriber, so the batched pipeline and the
+    fast tier are measured the way the bot uses them.
+    """
+    device = base.device or ("cuda" if torch.cuda.is_available() else "cpu")
+    audio = decode_audio(clip, sampling_rate=Transcriber.SAMPLE_RATE)
+    audio = audio[:int(config.clip_seconds * Transcriber.SAMPLE_RATE)]
+    duration = len(audio) / Transcriber.SAMPLE_RATE
+
+    cores = os.cpu_count() or 1
+
+    # baseline: the shipped defaults, whose output is the accuracy reference
+    transcriber = Transcriber(replace(base, device=device, cache_dir=None))
+    reference = transcriber.transcribe(audio)
+    del transcriber
+
+    compute_types = config.compute_types or COMPUTE_TYPES.get(device, COMPUTE_TYPES["cpu"])
+    results: List[dict] = []
+
+    for compute_type, workers in itertools.product(compute_types, config.worker_counts):
+        threads = max(1, cores // workers)
+
+        try:
+            transcriber = Transcriber(_candidate(base, device, compute_type, workers, threads))
+        except (ValueError, RuntimeError) as e:
+            logger.info(f"Skipping compute_type={compute_type}: {e}")
+            continue
+
+        for beam_size in config.beam_sizes:
+            _set_beam_size(transcriber, beam_size)
+
+            # one clip per worker, concurrently, as the transcription pool runs them
+            start = time.perf_counter()
+            texts = transcriber.transcribe_many([audio] * workers)
+            elapsed = time.perf_counter() - start
+
+            result = {
+                "compute_type": compute_type,
+                "beam_size": beam_size,
+                "num_workers": workers,
+                "cpu_threads": threads,
+                "rtf": elapsed / (duration * workers),
+                "wer": word_error_rate(reference, texts[0]),
+            }
+            results.append(result)
+
+            logger.info(
+                f"autotune {compute_type} beam={beam_size} workers={workers} "
+                f"threads={threads}: rtf={result['rtf']:.3f} wer={result['wer']:.3f}"
+            )
+
+        del transcriber
+
+    eligible = [r for r in results if r["wer"] <= config.max_wer]
+    if not eligible:
+        return None
+
+    best = min(eligible, key=lambda r: r["rtf"])
+    best.update({
+        "model_size": base.model_size,
+        "fast_model_size": base.fast_model_size,
+        "batch_size": base.batch_size,
+        "device": device,
+        "clip": os.path.basename(clip),
+        "tuned_at": int(time.time()),
+    })
+    return best
+
+
+def load_or_tune(
+        base: Optional[TranscriberConfig] = None,
+        config: Optional[AutotuneConfig] = None,
+        force: bool = False
+) -> TranscriberConfig:
+    """
+    Returns `base` with this host's tuned settings applied, tuning first
+    if no profile exists yet. Falls back to `base` if tuning is impossible.
+    """
+    base = base or TranscriberConfig()
+    config = config or AutotuneConfig()
+
+    device = base.device or ("cuda" if torch.cuda.is_available() else "cpu")
+    key = hardware_key(device)
+
+    entry = load_profile(config.profile_path).get(key)
+    if entry and profile_matches(entry, base) and not force:
+        logger.info(f"Using tuned Whisper profile for {key}")
+        return apply_profile(base, entry)
+
+    clip = find_clip(config)
+    if clip is None:
+        logger.warning(
+            "Whisper autotune skipped, using the default settings; it runs on the next start "
+            "once a clip is configured or a session has been recorded"
+        )
+        return base
+
+    logger.info(f"Tuning Whisper settings for {key} on {clip}...")
+    entry = tune(base, config, clip)
+
+    if entry is None:
+        logger.warning("Whisper autotune found no candidate within the accuracy floor")
+        return base
+
+    save_profile(config.profile_path, key, entry)
+    logger.info(
+        f"Whisper profile saved: compute_type={entry['compute_type']} "
+        f"beam={entry['beam_size']} workers={entry['num_workers']} "
+        f"threads={entry['cpu_threads']} rtf={entry['rtf']:.3f}"
+    )
+    return apply_profile(base, entry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clip", default=None, help="benchmark clip (WAV or any ffmpeg-readable file)")
+    parser.add_argument("--profile", default=AutotuneConfig.profile_path)
+    parser.add_argument("--model", default=TranscriberConfig.model_size)
+    parser.add_argument("--max-wer", type=float, default=AutotuneConfig.max_wer)
+    parser.add_argument("--force", action="store_true", help="re-tune even if a profile exists")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    tuned = load_or_tune(
+        TranscriberConfig(model_size=args.model),
+        AutotuneConfig(profile_path=args.profile, clip_path=args.clip, max_wer=args.max_wer),
+        force=args.force
+    )
+    print(tuned)
+
+
+if __name__ == "__main__":
+    main()
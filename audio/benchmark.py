@@ -0,0 +1,88 @@
+"""
+Throughput comparison of sequential vs pooled multi-speaker transcription.
+The pooled run uses Transcriber.transcribe_many, which queues one
+FairScheduler job per speaker as process_cut does, num_workers at a time.
+
+Usage:
+    python -m audio.benchmark recordings/session_*.wav
+"""
+import argparse
+import logging
+import time
+import wave
+
+from .transcriber import Transcriber, TranscriberConfig
+
+
+def audio_seconds(paths) -> float:
+    total = 0.0
+    for path in paths:
+        with wave.open(path, "rb") as wf:
+            total += wf.getnframes() / wf.getframerate()
+    return total
+
+
+def run(paths, config: TranscriberConfig) -> dict:
+    transcriber = Transcriber(config)
+    duration = audio_seconds(paths)
+
+    # warm-up so model initialisation is not counted
+    transcriber.transcribe_file(paths[0])
+
+    # baseline: the old loop, one file at a time, unbatched decoding
+    batched_pipeline, transcriber.batched = transcriber.batched, None
+    start = time.perf_counter()
+    for path in paths:
+        transcriber.transcribe_file(path)
+    sequential = time.perf_counter() - start
+    transcriber.batched = batched_pipeline
+
+    start = time.perf_counter()
+    transcriber.transcribe_many(list(paths))
+    pooled = time.perf_counter() - start
+
+    return {
+        "files": len(paths),
+        "audio_seconds": duration,
+        "sequential_seconds": sequential,
+        "pooled_seconds": pooled,
+        "sequential_rtf": sequential / duration,
+        "pooled_rtf": pooled / duration,
+        "speedup": sequential / pooled,
+        "routing": transcriber.routing_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="WAV files, e.g. one per speaker")
+    parser.add_argument("--model", default=TranscriberConfig.model_size)
+    parser.add_argument("--batch-size", type=int, default=TranscriberConfig.batch_size)
+    parser.add_argument("--workers", type=int, default=TranscriberConfig.num_workers)
+    parser.add_argument("--fast-model", default=TranscriberConfig.fast_model_size,
+                        help="fast routing tier; pass '' to disable")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    config = TranscriberConfig(
+        model_size=args.model,
+        batch_size=args.batch_size,
+        num_workers=args.workers,
+        fast_model_size=args.fast_model or None,
+        cache_dir=None
+    )
+
+    results = run(args.files, config)
+    routing = results.pop("routing")
+
+    for key, value in results.items():
+        print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+    for name, tier in routing["tiers"].items():
+        print(f"{name:>20}: {tier['calls']} calls, {tier['avg_latency']:.3f}s avg, rtf {tier['rtf']:.3f}")
+    print(f"{'escalation_rate':>20}: {routing['escalation_rate']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
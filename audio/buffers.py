@@ -0,0 +1,118 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+# ---------------------- BUFFER ----------------------
+
+class CaptureBuffer:
+    """
+    Fixed-capacity byte buffer holding one user's audio until it is spooled.
+    The storage is allocated once; appends never allocate.
+    """
+
+    __slots__ = ("_buf", "_size", "packets", "first_write")
+
+    def __init__(self, capacity: int):
+        self._buf = bytearray(capacity)
+        self._size = 0
+        self.packets = 0
+        self.first_write: Optional[float] = None
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def fits(self, length: int) -> bool:
+        return self._size + length <= len(self._buf)
+
+    def append(self, data: bytes, now: float) -> None:
+        end = self._size + len(data)
+        if end > len(self._buf):
+            raise BufferError("capture buffer overflow")
+
+        self._buf[self._size:end] = data
+        self._size = end
+        self.packets += 1
+
+        if self.first_write is None:
+            self.first_write = now
+
+    def age(self, now: float) -> float:
+        return 0.0 if self.first_write is None else now - self.first_write
+
+    def take(self) -> bytes:
+        data = bytes(memoryview(self._buf)[:self._size])
+        self._size = 0
+        self.packets = 0
+        self.first_write = None
+        return data
+
+
+# ---------------------- BUDGET ----------------------
+
+@dataclass
+class GuildMemoryUsage:
+    streams: int = 0
+    allocated: int = 0
+    buffered: int = 0
+
+
+class MemoryBudget:
+    """
+    Process-wide accounting of capture buffers, per guild.
+    Sinks flush their own buffers early while the buffered total is over the limit.
+    """
+
+    def __init__(self, limit_bytes: int = 64 * 1024 * 1024):
+        self.limit_bytes = limit_bytes
+
+        self._lock = threading.Lock()
+        self._usage: Dict[int, GuildMemoryUsage] = {}
+        self._buffered_total = 0
+
+    def allocate(self, guild_id: int, capacity: int) -> None:
+        with self._lock:
+            usage = self._usage.setdefault(guild_id, GuildMemoryUsage())
+            usage.streams += 1
+            usage.allocated += capacity
+
+    def free(self, guild_id: int, capacity: int) -> None:
+        with self._lock:
+            usage = self._usage.get(guild_id)
+            if usage:
+                usage.streams -= 1
+                usage.allocated -= capacity
+                if usage.streams <= 0:
+                    self._buffered_total -= usage.buffered
+                    del self._usage[guild_id]
+
+    def add(self, guild_id: int, delta: int) -> None:
+        with self._lock:
+            usage = self._usage.setdefault(guild_id, GuildMemoryUsage())
+            usage.buffered += delta
+            self._buffered_total += delta
+
+    def exceeded(self) -> bool:
+        return self._buffered_total > self.limit_bytes
+
+    @property
+    def buffered_total(self) -> int:
+        return self._buffered_total
+
+    def usage(self, guild_id: int) -> GuildMemoryUsage:
+        with self._lock:
+            usage = self._usage.get(guild_id)
+            return GuildMemoryUsage(**vars(usage)) if usage else GuildMemoryUsage()
+
+    def snapshot(self) -> Dict[int, GuildMemoryUsage]:
+        with self._lock:
+            return {gid: GuildMemoryUsage(**vars(u)) for gid, u in self._usage.items()}
+
+
+# shared by every sink in the process unless one is passed explicitly
+capture_budget = MemoryBudget()
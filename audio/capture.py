@@ -0,0 +1,142 @@
+import logging
+import os
+import wave
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from .opus_spool import decode_records, iter_records
+from .pcm import DISCORD_CHANNELS, DISCORD_RATE, WHISPER_RATE, WhisperDownsampler
+from .vad import SpeechTimeline, VoiceActivityGate
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CapturedStream:
+    """
+    One speaker's audio from a cut, still sitting in its spool file.
+
+    Hands audio to the transcriber without a WAV round trip; archiving
+    and deleting the spool are separate steps the caller may defer.
+    """
+
+    user_id: int
+    spool_path: str
+    sample_rate: int
+    channels: int
+    wav_name: str
+    timeline: Optional[SpeechTimeline] = None
+
+    def load(self) -> np.ndarray:
+        """
+        Returns float32 16 kHz mono samples, read through a memory map.
+        """
+        raw = self._read_pcm()
+
+        if raw is None:
+            return np.zeros(0, dtype=np.float32)
+
+        if (self.sample_rate, self.channels) == (DISCORD_RATE, DISCORD_CHANNELS):
+            raw = np.frombuffer(WhisperDownsampler().process(raw), dtype=np.int16)
+
+        elif (self.sample_rate, self.channels) != (WHISPER_RATE, 1):
+            raise ValueError(f"Unsupported spool format: {self.sample_rate} Hz x{self.channels}")
+
+        return raw.astype(np.float32) / 32768.0
+
+    def archive(self, dest_dir: str) -> Optional[str]:
+        """
+        Writes the audio as a WAV into `dest_dir` and removes the spool.
+        """
+        raw = self._read_pcm()
+        wav_path = None
+
+        if raw is not None:
+            os.makedirs(dest_dir, exist_ok=True)
+            wav_path = os.path.join(dest_dir, self.wav_name)
+
+            with wave.open(wav_path, "wb") as wf:
+                wf.setnchannels(self.channels)
+                wf.setsampwidth(2)
+                wf.setframerate(self.sample_rate)
+                wf.writeframes(raw.tobytes())
+
+            del raw
+
+        self.release()
+        return wav_path
+
+    def release(self) -> None:
+        try:
+            os.remove(self.spool_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Failed to remove spool {self.spool_path}: {e}")
+
+    def _read_pcm(self) -> Optional[np.ndarray]:
+        if not os.path.exists(self.spool_path) or os.path.getsize(self.spool_path) < 2:
+            return None
+
+        return np.memmap(self.spool_path, dtype=np.int16, mode="r")
+
+
+@dataclass
+class OpusCapturedStream(CapturedStream):
+    """
+    Stream spooled as raw Opus packets. Decoding, VAD and format conversion
+    happen in bulk on first access, on whatever thread calls load()/archive().
+    """
+
+    vad_aggressiveness: Optional[int] = None
+    vad_padding_frames: int = 10
+    vad_hangover_frames: int = 15
+
+    _pcm: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    def archive(self, dest_dir: str) -> Optional[str]:
+        try:
+            return super().archive(dest_dir)
+        finally:
+            self._pcm = None
+
+    def _read_pcm(self) -> Optional[np.ndarray]:
+        if self._pcm is None and os.path.exists(self.spool_path):
+            self._pcm = self._decode()
+
+        if self._pcm is None or not len(self._pcm):
+            return None
+
+        return self._pcm
+
+    def _decode(self) -> np.ndarray:
+        gate = None
+        if self.vad_aggressiveness is not None:
+            gate = VoiceActivityGate(
+                aggressiveness=self.vad_aggressiveness,
+                padding_frames=self.vad_padding_frames,
+                hangover_frames=self.vad_hangover_frames
+            )
+
+        downsampler = None
+        if (self.sample_rate, self.channels) == (WHISPER_RATE, 1):
+            downsampler = WhisperDownsampler()
+
+        timeline = SpeechTimeline()
+        chunks = []
+
+        for pcm, wall_time in decode_records(iter_records(self.spool_path)):
+            frames = gate.process(pcm, wall_time) if gate else [(pcm, wall_time)]
+
+            for frame, frame_wall in frames:
+                timeline.append(len(frame) / (DISCORD_RATE * DISCORD_CHANNELS * 2), frame_wall)
+                chunks.append(frame)
+
+        pcm = b"".join(chunks)
+        if downsampler:
+            pcm = downsampler.process(pcm)
+
+        self.timeline = timeline
+        return np.frombuffer(pcm, dtype=np.int16)
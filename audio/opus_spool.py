@@ -0,0 +1,78 @@
+import logging
+import struct
+from typing import Iterator, Tuple
+
+import discord.opus
+
+logger = logging.getLogger(__name__)
+
+# sequence (u16), RTP timestamp (u32), receive time (f64), payload length (u16)
+RECORD_HEADER = struct.Struct("<HIdH")
+
+FRAME_SECONDS = 0.02
+
+# longer sequence gaps are treated as a stream discontinuity, not packet loss
+MAX_CONCEALED_FRAMES = 10
+
+
+def pack_record(sequence: int, timestamp: int, wall_time: float, payload: bytes) -> bytes:
+    return RECORD_HEADER.pack(sequence & 0xFFFF, timestamp & 0xFFFFFFFF, wall_time, len(payload)) + payload
+
+
+def iter_records(path: str) -> Iterator[Tuple[int, int, float, bytes]]:
+    """
+    Yields (sequence, timestamp, wall_time, payload) from a length-prefixed spool.
+    A truncated trailing record is ignored.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    view = memoryview(data)
+    pos = 0
+    header = RECORD_HEADER.size
+
+    while pos + header <= len(view):
+        seq, ts, wall, size = RECORD_HEADER.unpack_from(view, pos)
+        pos += header
+
+        if pos + size > len(view):
+            logger.warning(f"Truncated Opus record in {path}")
+            break
+
+        yield seq, ts, wall, bytes(view[pos:pos + size])
+        pos += size
+
+
+def decode_records(records) -> Iterator[Tuple[bytes, float]]:
+    """
+    Decodes Opus records into 20 ms PCM frames (48 kHz stereo int16) with
+    their estimated receive time.
+
+    Short sequence gaps are concealed: all but the last lost frame via PLC,
+    the last one from the next packet's in-band FEC data.
+    """
+    decoder = discord.opus.Decoder()
+    last_seq = None
+
+    for seq, _, wall, payload in records:
+        if last_seq is not None:
+            delta = (seq - last_seq) & 0xFFFF
+
+            if delta == 0 or delta >= 0x8000:
+                # duplicate or reordered packet that arrived too late
+                continue
+
+            gap = delta - 1
+
+            if 0 < gap <= MAX_CONCEALED_FRAMES:
+                for k in range(gap, 1, -1):
+                    yield decoder.decode(None), wall - k * FRAME_SECONDS
+                yield decoder.decode(payload, fec=True), wall - FRAME_SECONDS
+
+        last_seq = seq
+
+        try:
+            yield decoder.decode(payload), wall
+        except discord.opus.OpusError as e:
+            logger.debug(f"Opus decode failed for seq {seq}: {e}")
+            yield decoder.decode(None), wall
@@ -0,0 +1,50 @@
+import numpy as np
+
+# Discord delivers 48 kHz stereo; Whisper works on 16 kHz mono.
+DISCORD_RATE = 48000
+DISCORD_CHANNELS = 2
+WHISPER_RATE = 16000
+
+
+def lowpass_taps(num_taps: int, cutoff: float) -> np.ndarray:
+    """
+    Windowed-sinc FIR low-pass. `cutoff` is relative to Nyquist (0..1).
+    """
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = cutoff * np.sinc(cutoff * n) * np.hamming(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class WhisperDownsampler:
+    """
+    Streaming 48 kHz stereo -> 16 kHz mono converter for int16 PCM.
+
+    Keeps filter history between calls, so feeding a stream chunk by chunk
+    gives the same result as converting it in one go.
+    """
+
+    FACTOR = DISCORD_RATE // WHISPER_RATE
+
+    def __init__(self, num_taps: int = 63):
+        # cut slightly below the new Nyquist frequency to keep aliasing out
+        self.taps = lowpass_taps(num_taps, 0.9 / self.FACTOR)[::-1].copy()
+
+        self._history = np.zeros(num_taps - 1, dtype=np.float32)
+        self._skip = 0
+
+    def process(self, pcm: bytes) -> bytes:
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        mono = samples.reshape(-1, DISCORD_CHANNELS).mean(axis=1, dtype=np.float32)
+
+        if not len(mono):
+            return b""
+
+        signal = np.concatenate((self._history, mono))
+        windows = np.lib.stride_tricks.sliding_window_view(signal, len(self.taps))
+
+        out = windows[self._skip::self.FACTOR] @ self.taps
+
+        self._skip = (self._skip - len(mono)) % self.FACTOR
+        self._history = signal[len(signal) - len(self._history):]
+
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16).tobytes()
@@ -0,0 +1,73 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def frame_energy(audio: np.ndarray, frame: int) -> np.ndarray:
+    """
+    RMS energy per non-overlapping frame.
+    """
+    usable = len(audio) // frame * frame
+    frames = audio[:usable].reshape(-1, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def split_on_silence(
+        audio: np.ndarray,
+        sample_rate: int,
+        target_seconds: float,
+        max_seconds: float,
+        min_silence_seconds: float = 0.3,
+        frame_seconds: float = 0.03
+) -> List[Tuple[int, int]]:
+    """
+    Splits a long mono signal into (start, end) sample windows.
+
+    Cuts are placed in the middle of silent stretches, preferring the first
+    silence after `target_seconds`; if a window reaches `max_seconds`
+    without one, it is cut at its quietest frame instead.
+    """
+    total = len(audio)
+    if total <= max_seconds * sample_rate:
+        return [(0, total)]
+
+    frame = int(frame_seconds * sample_rate)
+    energy = frame_energy(audio, frame)
+
+    # relative threshold: ~26 dB below the loud (speech) level of this file
+    threshold = max(np.percentile(energy, 95) * 0.05, 1e-4)
+    silent = energy < threshold
+
+    min_run = max(int(min_silence_seconds / frame_seconds), 1)
+    candidates = _silence_centres(silent, min_run)
+
+    target = int(target_seconds / frame_seconds)
+    limit = int(max_seconds / frame_seconds)
+
+    cuts = []
+    start = 0
+    n_frames = len(energy)
+
+    while n_frames - start > limit:
+        lo, hi = start + target, start + limit
+        in_range = candidates[(candidates >= lo) & (candidates <= hi)]
+
+        if len(in_range):
+            cut = int(in_range[0])
+        else:
+            cut = lo + int(np.argmin(energy[lo:hi]))
+
+        cuts.append(cut)
+        start = cut
+
+    bounds = [0] + [c * frame for c in cuts] + [total]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _silence_centres(silent: np.ndarray, min_run: int) -> np.ndarray:
+    padded = np.concatenate(([False], silent, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+
+    long_enough = (ends - starts) >= min_run
+    return (starts[long_enough] + ends[long_enough]) // 2
@@ -1,27 +1,192 @@
+import logging
 import os
+import shutil
 import time
-import wave
-import collections
+import uuid
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
 import discord
 import discord.opus
 from discord.ext import voice_recv
 
+from .buffers import CaptureBuffer, GuildMemoryUsage, MemoryBudget, capture_budget
+from .capture import CapturedStream, OpusCapturedStream
+from .opus_spool import RECORD_HEADER, pack_record
+from .pcm import DISCORD_CHANNELS, DISCORD_RATE, WHISPER_RATE, WhisperDownsampler
+from .spooler import SpoolWriter, SpoolStats
+from .vad import SpeechTimeline, VoiceActivityGate
+
+logger = logging.getLogger(__name__)
+
+
+class SpoolSyncTimeout(Exception):
+    pass
+
+
+# ---------------------- CONFIG ----------------------
+
+@dataclass
+class SinkConfig:
+    temp_dir: str = "temp_pcm"
+    recordings_dir: str = "recordings"
+
+    # per-user capture buffers: flushed when full, when older than
+    # max_buffer_seconds, or early while the process-wide budget is exceeded
+    buffer_capacity: Optional[int] = None  # bytes; None sizes it for max_buffer_seconds
+    max_buffer_seconds: float = 10.0
+    # how often a timer flushes buffers past max_buffer_seconds (users who went quiet)
+    sweep_interval: float = 1.0
+
+    # "opus": length-prefixed raw packets, decoded in bulk at cut time
+    # "pcm": decoded on the receive thread
+    spool_codec: str = "opus"
+
+    # "native": 48 kHz stereo as decoded; "whisper": 16 kHz mono, converted at flush time
+    capture_format: str = "whisper"
+
+    # write-behind spooler
+    spool_queue_size: int = 256
+    spool_buffer_size: int = 256 * 1024
+    spool_sync_timeout: float = 10.0
+    # extra waits of spool_sync_timeout before a cut fails with SpoolSyncTimeout
+    spool_sync_retries: int = 5
+
+    # voice activity detection (None disables it); with the opus codec it runs at decode time
+    vad_aggressiveness: Optional[int] = None
+    vad_padding_ms: int = 200
+    vad_hangover_ms: int = 300
+
+
+# ---------------------- SPOOL LAYOUT ----------------------
+
+def guild_spool_dir(guild_id: int, temp_dir: str = "temp_pcm") -> str:
+    return os.path.join(temp_dir, str(guild_id))
+
+
+# session ids of sinks created by this process; their spool files may still be
+# waiting on a deferred transcription or a background archive
+_process_sessions = set()
+
+
+def prune_guild_spool(guild_id: int, temp_dir: str = "temp_pcm") -> None:
+    """
+    Removes spool directories of a single guild that no longer hold pending work:
+    leftovers of earlier runs, and sessions of this process whose streams were
+    all archived or released. Other guilds are untouched.
+    """
+    root = guild_spool_dir(guild_id, temp_dir)
+
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return
+
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+
+        if entry.name not in _process_sessions:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            continue
+
+        try:
+            os.rmdir(entry.path)
+        except OSError:
+            # still holds spool files; dispose/archive removes them
+            continue
+
+        _process_sessions.discard(entry.name)
+
+
+# ---------------------- SINK ----------------------
 
 class ScribeSink(voice_recv.AudioSink):
 
-    def __init__(self, temp_dir="temp_pcm", recordings_dir="recordings", flush_threshold=500):
+    # decoded Discord audio: 48 kHz, 2 channels, int16, 20 ms per packet
+    BYTES_PER_SECOND = DISCORD_RATE * DISCORD_CHANNELS * 2
+    FRAME_MS = 20
+
+    # upper bound for spooled Opus: 50 packets/s, generous payload size
+    OPUS_BYTES_PER_SECOND = 50 * (RECORD_HEADER.size + 400)
+
+    # capture_format -> (sample rate, channels) of spool and WAV files
+    CAPTURE_FORMATS = {
+        "native": (DISCORD_RATE, DISCORD_CHANNELS),
+        "whisper": (WHISPER_RATE, 1),
+    }
+
+    SPOOL_EXTENSIONS = {
+        "pcm": ".pcm",
+        "opus": ".opuspkt",
+    }
+
+    def __init__(
+            self,
+            guild_id: int,
+            config: Optional[SinkConfig] = None,
+            budget: Optional[MemoryBudget] = None
+    ):
         super().__init__()
 
-        self.temp_dir = temp_dir
-        self.recordings_dir = recordings_dir
+        self.config = config or SinkConfig()
+
+        if self.config.capture_format not in self.CAPTURE_FORMATS:
+            raise ValueError(f"Unknown capture_format: {self.config.capture_format}")
+
+        if self.config.spool_codec not in self.SPOOL_EXTENSIONS:
+            raise ValueError(f"Unknown spool_codec: {self.config.spool_codec}")
+
+        self.guild_id = guild_id
+        self.session_id = f"{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        _process_sessions.add(self.session_id)
 
-        self.user_buffers = collections.defaultdict(list)
-        self.packet_counters = collections.defaultdict(int)
+        # temp_pcm/<guild_id>/<session_id>/stream_<uid>_<segment>.<ext>
+        self.temp_dir = os.path.join(
+            guild_spool_dir(guild_id, self.config.temp_dir),
+            self.session_id
+        )
+        self.recordings_dir = self.config.recordings_dir
+
+        # uid -> spool path of streams with data on disk since the last cut
+        self.open_streams: Dict[int, str] = {}
+        self._segments: Dict[int, int] = {}
+        self._segment_counter = 0
+
+        # uid -> (first, last) packet time of the utterance being captured
+        self._activity: Dict[int, Tuple[float, float]] = {}
+
+        self.budget = budget or capture_budget
+        self.buffer_capacity = self.config.buffer_capacity or self._default_capacity()
+        self.user_buffers: Dict[int, CaptureBuffer] = {}
         self.decoders = {}
-        self.flush_threshold = flush_threshold
+
+        # guards buffers and the stream index: write() runs on the voice thread
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+        self.vad_gates: Dict[int, VoiceActivityGate] = {}
+        self.downsamplers: Dict[int, WhisperDownsampler] = {}
+        self.timelines: Dict[int, SpeechTimeline] = {}
+        # streams detached by a take whose spool sync timed out; handed over by the next take
+        self._unsynced: List[CapturedStream] = []
 
         os.makedirs(self.temp_dir, exist_ok=True)
 
+        self.spooler = SpoolWriter(
+            max_queue=self.config.spool_queue_size,
+            buffer_size=self.config.spool_buffer_size
+        )
+
+        # write() only runs for users who are talking; this flushes everyone else on time
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop,
+            name=f"sink-sweep-{guild_id}",
+            daemon=True
+        )
+        self._sweeper.start()
+
     def wants_opus(self):
         return True
 
@@ -31,63 +196,322 @@ class ScribeSink(voice_recv.AudioSink):
 
         uid = user.id
 
-        if uid not in self.decoders:
-            self.decoders[uid] = discord.opus.Decoder()
-
         try:
             packet_bytes = getattr(data.packet, "decrypted_data", data.packet.payload)
-            pcm = self.decoders[uid].decode(packet_bytes, fec=True)
 
-            self.user_buffers[uid].append(pcm)
-            self.packet_counters[uid] += 1
+            with self._lock:
+                if self.config.spool_codec == "opus":
+                    self._write_opus(uid, data.packet, packet_bytes)
+                else:
+                    self._write_pcm(uid, packet_bytes)
 
-            if self.packet_counters[uid] >= self.flush_threshold:
-                self.flush_to_disk(uid)
+                self._apply_flush_policy(uid)
+                self._track_activity(uid)
 
         except Exception as e:
-            print(f"ScribeSink decode error: {e}")
+            logger.exception(f"ScribeSink decode error for guild {self.guild_id}: {e}")
+
+    def _write_opus(self, uid, packet, packet_bytes):
+        # no decoding here: sequence numbers let the cut-time decoder conceal losses
+        record = pack_record(packet.sequence, packet.timestamp, time.time(), packet_bytes)
+        self._buffer(uid, record)
+
+    def _write_pcm(self, uid, packet_bytes):
+        if uid not in self.decoders:
+            self.decoders[uid] = discord.opus.Decoder()
+
+        pcm = self.decoders[uid].decode(packet_bytes, fec=True)
+        received_at = time.time()
+
+        gate = self._vad_gate(uid)
+        frames = gate.process(pcm, received_at) if gate else [(pcm, received_at)]
+
+        if uid not in self.timelines:
+            self.timelines[uid] = SpeechTimeline()
+
+        for frame, wall_time in frames:
+            self._buffer(uid, frame)
+            self.timelines[uid].append(len(frame) / self.BYTES_PER_SECOND, wall_time)
+
+    # ---------------------- BUFFERING ----------------------
+
+    def _default_capacity(self) -> int:
+        rate = self.OPUS_BYTES_PER_SECOND if self.config.spool_codec == "opus" else self.BYTES_PER_SECOND
+        return int(rate * self.config.max_buffer_seconds)
+
+    def _buffer(self, uid, data: bytes) -> None:
+        buf = self.user_buffers.get(uid)
+
+        if buf is None:
+            buf = CaptureBuffer(self.buffer_capacity)
+            self.user_buffers[uid] = buf
+            self.budget.allocate(self.guild_id, buf.capacity)
+
+        if not buf.fits(len(data)):
+            self._flush_locked(uid)
+
+        if len(data) > buf.capacity:
+            # oversized chunk: hand it to the spooler as is
+            self.spooler.submit(self._spool_path(uid), data, transform=self._format_transform(uid))
+            return
+
+        buf.append(data, time.monotonic())
+        self.budget.add(self.guild_id, len(data))
+
+    def _track_activity(self, uid) -> None:
+        now = time.monotonic()
+        start, _ = self._activity.get(uid, (now, now))
+        self._activity[uid] = (start, now)
+
+    def _apply_flush_policy(self, uid) -> None:
+        now = time.monotonic()
+        max_age = self.config.max_buffer_seconds
+
+        buf = self.user_buffers.get(uid)
+        if buf and buf.age(now) >= max_age:
+            self._flush_locked(uid)
+
+        if self.budget.exceeded():
+            by_size = sorted(self.user_buffers, key=lambda u: self.user_buffers[u].size, reverse=True)
+            for other in by_size:
+                if not self.budget.exceeded() or not self.user_buffers[other].size:
+                    break
+                self._flush_locked(other)
+
+    def sweep(self) -> None:
+        """
+        Flushes every buffer older than max_buffer_seconds.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            for uid, buf in self.user_buffers.items():
+                if buf.age(now) >= self.config.max_buffer_seconds:
+                    self._flush_locked(uid)
+
+    def _sweep_loop(self) -> None:
+        while not self._closed.wait(self.config.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.exception(f"ScribeSink sweep error for guild {self.guild_id}: {e}")
+
+    def memory_usage(self) -> GuildMemoryUsage:
+        """
+        Capture buffer memory of this sink's guild: streams, allocated and buffered bytes.
+        """
+        return self.budget.usage(self.guild_id)
+
+    def _vad_gate(self, uid) -> Optional[VoiceActivityGate]:
+        if self.config.vad_aggressiveness is None:
+            return None
+
+        gate = self.vad_gates.get(uid)
+
+        if gate is None:
+            gate = VoiceActivityGate(
+                aggressiveness=self.config.vad_aggressiveness,
+                padding_frames=self.config.vad_padding_ms // self.FRAME_MS,
+                hangover_frames=self.config.vad_hangover_ms // self.FRAME_MS
+            )
+            self.vad_gates[uid] = gate
+
+        return gate
 
     def flush_to_disk(self, uid):
-        if not self.user_buffers[uid]:
+        """
+        Hands the user's buffer to the spool writer. Disk I/O happens off-thread.
+        """
+        with self._lock:
+            self._flush_locked(uid)
+
+    def _flush_locked(self, uid):
+        buf = self.user_buffers.get(uid)
+
+        if buf is None or not buf.size:
             return
 
-        filename = os.path.join(self.temp_dir, f"stream_{uid}.pcm")
+        data = buf.take()
+        self.budget.add(self.guild_id, -len(data))
+
+        self.spooler.submit(
+            self._spool_path(uid),
+            data,
+            transform=self._format_transform(uid)
+        )
+
+    def _spool_path(self, uid) -> str:
+        filename = self.open_streams.get(uid)
+
+        if filename is None:
+            self._segment_counter += 1
+            ext = self.SPOOL_EXTENSIONS[self.config.spool_codec]
+            filename = os.path.join(self.temp_dir, f"stream_{uid}_{self._segment_counter}{ext}")
+            self.open_streams[uid] = filename
+            self._segments[uid] = self._segment_counter
+
+        return filename
+
+    def _format_transform(self, uid):
+        if self.config.spool_codec != "pcm" or self.config.capture_format != "whisper":
+            return None
 
-        with open(filename, "ab") as f:
-            f.write(b"".join(self.user_buffers[uid]))
+        if uid not in self.downsamplers:
+            self.downsamplers[uid] = WhisperDownsampler()
 
-        self.user_buffers[uid] = []
-        self.packet_counters[uid] = 0
+        return self.downsamplers[uid].process
+
+    def flush_all(self):
+        with self._lock:
+            for uid in list(self.user_buffers.keys()):
+                self._flush_locked(uid)
+
+    @property
+    def spool_stats(self) -> SpoolStats:
+        return self.spooler.stats
 
     def cleanup(self):
-        for uid in list(self.user_buffers.keys()):
-            self.flush_to_disk(uid)
+        # may run from AudioSink.__del__ on a partially built sink
+        if not hasattr(self, "spooler"):
+            return
 
-    def save_and_clear_buffers(self):
-        self.cleanup()
-        saved_files = []
+        self._closed.set()
+
+        try:
+            self.flush_all()
+        finally:
+            self.spooler.close()
+
+            with self._lock:
+                for buf in self.user_buffers.values():
+                    self.budget.free(self.guild_id, buf.capacity)
+                self.user_buffers.clear()
+
+    def take_cut(self) -> List[CapturedStream]:
+        """
+        Detaches this session's spooled streams for transcription.
+        New audio keeps spooling into fresh files; only streams indexed
+        by this sink are touched.
+        """
+        with self._lock:
+            captured = self._unsynced + self._detach_locked(list(self.open_streams) + list(self.user_buffers))
+            self._unsynced = []
+            self._activity.clear()
+
+        return self._synced(captured)
+
+    def take_utterances(self, gap: float, max_length: float) -> List[CapturedStream]:
+        """
+        Detaches the streams of users who finished an utterance: silent for
+        `gap` seconds, or talking for longer than `max_length` seconds.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            ended = [
+                uid for uid, (start, last) in self._activity.items()
+                if now - last >= gap or now - start >= max_length
+            ]
+
+            for uid in ended:
+                del self._activity[uid]
+
+            captured = self._unsynced + self._detach_locked(ended)
+            self._unsynced = []
+
+        return self._synced(captured)
+
+    def _detach_locked(self, uids) -> List[CapturedStream]:
         ts = int(time.time())
+        rate, channels = self.CAPTURE_FORMATS[self.config.capture_format]
+
+        captured = []
+
+        for uid in dict.fromkeys(uids):
+            self._flush_locked(uid)
 
-        os.makedirs(self.recordings_dir, exist_ok=True)
+            # later writes go to a fresh file, queued behind the caller's sync barrier
+            spool_path = self.open_streams.pop(uid, None)
+            segment = self._segments.pop(uid, 0)
+            timeline = self.timelines.pop(uid, None)
 
-        for filename in os.listdir(self.temp_dir):
-            if not filename.endswith(".pcm"):
+            if spool_path is None:
                 continue
 
-            uid = int(filename.split("_")[1].split(".")[0])
-            pcm_path = os.path.join(self.temp_dir, filename)
-            wav_path = os.path.join(self.recordings_dir, f"session_{uid}_{ts}.wav")
+            wav_name = f"session_{self.guild_id}_{uid}_{ts}_{segment}.wav"
+
+            if self.config.spool_codec == "opus":
+                stream = OpusCapturedStream(
+                    user_id=uid,
+                    spool_path=spool_path,
+                    sample_rate=rate,
+                    channels=channels,
+                    wav_name=wav_name,
+                    vad_aggressiveness=self.config.vad_aggressiveness,
+                    vad_padding_frames=self.config.vad_padding_ms // self.FRAME_MS,
+                    vad_hangover_frames=self.config.vad_hangover_ms // self.FRAME_MS
+                )
+            else:
+                stream = CapturedStream(
+                    user_id=uid,
+                    spool_path=spool_path,
+                    sample_rate=rate,
+                    channels=channels,
+                    wav_name=wav_name,
+                    timeline=timeline
+                )
+
+            captured.append(stream)
+
+        return captured
 
-            with open(pcm_path, "rb") as f:
-                data = f.read()
+    def _synced(self, captured: List[CapturedStream]) -> List[CapturedStream]:
+        """
+        Waits until the detached streams are fully on disk; only streams that
+        never received data are dropped. If the disk stays busy past the retry
+        limit, raises SpoolSyncTimeout and keeps the streams for the next take.
+        """
+        if not captured:
+            return captured
 
-            with wave.open(wav_path, "wb") as wf:
-                wf.setnchannels(2)
-                wf.setsampwidth(2)
-                wf.setframerate(48000)
-                wf.writeframes(data)
+        for attempt in range(self.config.spool_sync_retries + 1):
+            if self.spooler.sync(close_files=True, timeout=self.config.spool_sync_timeout):
+                break
+
+            logger.warning(
+                f"Spool writer for guild {self.guild_id} still busy after "
+                f"{(attempt + 1) * self.config.spool_sync_timeout:.0f}s "
+                f"({self.spooler.stats.bytes_pending} bytes pending); "
+                f"holding {len(captured)} stream(s)"
+            )
+        else:
+            with self._lock:
+                self._unsynced = captured + self._unsynced
+
+            raise SpoolSyncTimeout(
+                f"Spool writer for guild {self.guild_id} did not catch up; "
+                f"{len(captured)} stream(s) kept for the next cut"
+            )
+
+        synced = []
+        for stream in captured:
+            if os.path.exists(stream.spool_path):
+                synced.append(stream)
+            else:
+                # the spooler creates the file on first data, so this stream had none
+                logger.info(f"No audio spooled for user {stream.user_id}, skipping {stream.spool_path}")
+
+        return synced
+
+    def save_and_clear_buffers(self) -> List[Tuple[int, str]]:
+        """
+        Converts this session's spooled streams into WAV files in recordings_dir.
+        """
+        saved_files = []
 
-            os.remove(pcm_path)
-            saved_files.append((uid, wav_path))
+        for stream in self.take_cut():
+            wav_path = stream.archive(self.recordings_dir)
+            if wav_path:
+                saved_files.append((stream.user_id, wav_path))
 
-        return saved_files
\ No newline at end of file
+        return saved_files
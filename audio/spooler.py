@@ -0,0 +1,220 @@
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------- STATS ----------------------
+
+@dataclass
+class SpoolStats:
+    queue_depth: int = 0
+    bytes_pending: int = 0
+    bytes_written: int = 0
+    batches_written: int = 0
+    backpressure_waits: int = 0
+    last_flush_latency: float = 0.0
+    max_flush_latency: float = 0.0
+
+
+# ---------------------- WRITER ----------------------
+
+class SpoolWriter:
+    """
+    Write-behind stage for spool files.
+
+    The voice-receive thread only enqueues byte chunks; a background thread
+    drains the bounded queue, coalesces chunks per file and appends them
+    through preallocated write buffers.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_queue: int = 256, buffer_size: int = 256 * 1024):
+        self.buffer_size = buffer_size
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._handles: Dict[str, object] = {}
+        self._stats = SpoolStats()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="spool-writer",
+            daemon=True
+        )
+        self._thread.start()
+
+    # ---------------------- PUBLIC API ----------------------
+
+    def submit(
+            self,
+            path: str,
+            data: bytes,
+            transform: Optional[Callable[[bytes], bytes]] = None
+    ) -> None:
+        """
+        Queues a chunk for appending to `path`. Never touches the filesystem.
+        Blocks only when the queue is full (counted as backpressure).
+
+        `transform` (e.g. format conversion) runs on the writer thread,
+        in submission order, right before the chunk is written.
+        """
+        if self._closed:
+            raise RuntimeError("SpoolWriter is closed")
+
+        if not data:
+            return
+
+        with self._stats_lock:
+            self._stats.bytes_pending += len(data)
+
+        item = ("write", path, data, transform)
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats.backpressure_waits += 1
+            self._queue.put(item)
+
+    def sync(self, close_files: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until everything submitted so far is on disk.
+        With `close_files`, open handles are released so files can be read or removed.
+        """
+        if self._closed:
+            return True
+
+        done = threading.Event()
+        self._queue.put(("sync", close_files, done))
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """
+        Drains the queue, closes all files and stops the writer thread.
+        Safe to call multiple times.
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    @property
+    def stats(self) -> SpoolStats:
+        with self._stats_lock:
+            snapshot = SpoolStats(**vars(self._stats))
+        snapshot.queue_depth = self._queue.qsize()
+        return snapshot
+
+    # ---------------------- INTERNAL ----------------------
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = [item]
+
+            # coalesce everything that is already waiting
+            while item is not self._STOP:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            stop = self._process(batch)
+
+            if stop:
+                self._close_handles()
+                return
+
+    def _process(self, batch) -> bool:
+        pending: Dict[str, list] = {}
+        stop = False
+
+        for item in batch:
+            if item is self._STOP:
+                stop = True
+                break
+
+            kind = item[0]
+
+            if kind == "write":
+                _, path, data, transform = item
+                pending.setdefault(path, []).append((data, transform))
+
+            elif kind == "sync":
+                _, close_files, done = item
+                self._write_pending(pending)
+                pending = {}
+                self._flush_handles(close_files)
+                done.set()
+
+        self._write_pending(pending)
+
+        if stop:
+            # wake up anyone still waiting for a barrier behind the stop marker
+            for item in batch[batch.index(self._STOP) + 1:]:
+                if item[0] == "sync":
+                    item[2].set()
+
+        return stop
+
+    def _write_pending(self, pending: Dict[str, list]) -> None:
+        if not pending:
+            return
+
+        start = time.perf_counter()
+        written = 0
+
+        for path, chunks in pending.items():
+            for data, transform in chunks:
+                try:
+                    self._handle(path).write(transform(data) if transform else data)
+                except Exception as e:
+                    logger.error(f"Spool write failed for {path}: {e}")
+
+                # pending is accounted in submitted (pre-transform) bytes
+                written += len(data)
+
+        latency = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._stats.bytes_pending -= written
+            self._stats.bytes_written += written
+            self._stats.batches_written += 1
+            self._stats.last_flush_latency = latency
+            self._stats.max_flush_latency = max(self._stats.max_flush_latency, latency)
+
+    def _handle(self, path: str):
+        handle = self._handles.get(path)
+
+        if handle is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            handle = open(path, "ab", buffering=self.buffer_size)
+            self._handles[path] = handle
+
+        return handle
+
+    def _flush_handles(self, close_files: bool) -> None:
+        for path, handle in list(self._handles.items()):
+            try:
+                handle.flush()
+                if close_files:
+                    handle.close()
+            except OSError as e:
+                logger.error(f"Spool flush failed for {path}: {e}")
+
+        if close_files:
+            self._handles.clear()
+
+    def _close_handles(self) -> None:
+        self._flush_handles(close_files=True)
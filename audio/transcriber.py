@@ -1,12 +1,26 @@
+import hashlib
 import logging
 import os
-from dataclasses import dataclass
-from typing import Optional, Iterable
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
 
+import numpy as np
 import torch
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
+
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:  # faster-whisper < 1.1
+    BatchedInferencePipeline = None
+
+from core.scheduling import FairScheduler, Priority
+from storage.cache import DiskCache
 
 from .gpu_setup import setup_windows_cuda_paths
+from .silence import split_on_silence
 
 logger = logging.getLogger(__name__)
 
@@ -21,11 +35,75 @@ class TranscriberConfig:
     language: Optional[str] = "uk"
     beam_size: int = 5
 
+    # >1 enables faster-whisper's batched pipeline (segments decoded as a batch)
+    batch_size: int = 8
+    # parallel transcriptions (CTranslate2 workers / scheduler threads)
+    num_workers: int = 2
+    # threads per worker; 0 splits the CPU cores evenly between workers
+    cpu_threads: int = 0
+
+    # long inputs are split at silences and the windows transcribed in parallel
+    chunk_min_seconds: float = 180.0
+    chunk_target_seconds: float = 60.0
+    chunk_max_seconds: float = 120.0
+
+    # tiered routing: short or quiet clips go to the fast model first and only
+    # low-confidence segments are re-decoded with model_size; None disables it
+    fast_model_size: Optional[str] = "small"
+    fast_beam_size: int = 1
+    route_max_seconds: float = 15.0
+    route_max_rms: float = 0.02
+    escalate_logprob: float = -0.7
+    escalate_no_speech: float = 0.5
+    # above this share of escalated audio the whole clip is redone at once
+    escalate_whole_ratio: float = 0.5
+
+    # segment-level results keyed by PCM content + decoding settings; None disables
+    cache_dir: Optional[str] = "transcript_cache"
+    cache_max_mb: int = 256
+
+
+@dataclass
+class TranscriptSegment:
+    start: float
+    end: float
+    text: str
+    avg_logprob: float = 0.0
+    no_speech_prob: float = 0.0
+
+
+@dataclass
+class TierStats:
+    calls: int = 0
+    seconds: float = 0.0
+    audio_seconds: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+    @property
+    def rtf(self) -> float:
+        return self.seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+
+@dataclass
+class ModelTier:
+    name: str
+    model: WhisperModel
+    beam_size: int
+    batched: Optional[object] = None
+    stats: TierStats = field(default_factory=TierStats)
+
 
 # ---------------------- TRANSCRIBER ----------------------
 
 class Transcriber:
 
+    SAMPLE_RATE = 16000
+    # bump when the cached segment format or decoding pipeline changes
+    CACHE_VERSION = 1
+
     def __init__(self, config: Optional[TranscriberConfig] = None):
         self.config = config or TranscriberConfig()
 
@@ -34,22 +112,50 @@ class Transcriber:
         if self.config.device is None:
             self.config.device = "cuda" if torch.cuda.is_available() else "cpu"
 
-        logger.info(
-            f"Loading Whisper model '{self.config.model_size}' "
-            f"on {self.config.device}..."
-        )
+        if self.config.cpu_threads == 0:
+            self.config.cpu_threads = max(1, (os.cpu_count() or 1) // max(self.config.num_workers, 1))
 
-        self.model = WhisperModel(
-            self.config.model_size,
-            device=self.config.device,
-            compute_type=self.config.compute_type
-        )
+        self.model = self._load_model(self.config.model_size)
+
+        self.batched = None
+        if self.config.batch_size > 1 and BatchedInferencePipeline is not None:
+            self.batched = BatchedInferencePipeline(model=self.model)
+
+        self.main_tier = ModelTier(self.config.model_size, self.model, self.config.beam_size)
+
+        self.fast_tier = None
+        if self.config.fast_model_size and self.config.fast_model_size != self.config.model_size:
+            self.fast_tier = ModelTier(
+                self.config.fast_model_size,
+                self._load_model(self.config.fast_model_size),
+                self.config.fast_beam_size
+            )
+
+        self._stats_lock = threading.Lock()
+        self.routed_clips = 0
+        self.escalated_clips = 0
+
+        self.cache = None
+        if self.config.cache_dir:
+            self.cache = DiskCache(
+                self.config.cache_dir,
+                max_bytes=self.config.cache_max_mb * 1024 * 1024,
+                name="transcripts"
+            )
 
         logger.info("Whisper model loaded successfully.")
 
     # ---------------------- PUBLIC API ----------------------
 
-    def transcribe_file(self, file_path: str) -> str:
+    def transcribe(self, source, cancel_event: Optional[threading.Event] = None) -> str:
+        """
+        Transcribes a file path or a 16 kHz float32 array.
+        """
+        if isinstance(source, str):
+            return self.transcribe_file(source, cancel_event)
+        return self.transcribe_stream(source, cancel_event)
+
+    def transcribe_file(self, file_path: str, cancel_event: Optional[threading.Event] = None) -> str:
         """
         Transcribes an audio file and returns full text.
         """
@@ -58,32 +164,348 @@ class Transcriber:
             return ""
 
         try:
-            segments = self._transcribe(file_path)
+            segments = self._transcribe(file_path, cancel_event)
             return " ".join(segment.text.strip() for segment in segments)
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
             return ""
 
-    def transcribe_stream(self, audio_source) -> str:
+    def transcribe_stream(self, audio_source, cancel_event: Optional[threading.Event] = None) -> str:
         """
         Transcribe from file-like object or numpy array.
         """
         try:
-            segments = self._transcribe(audio_source)
+            segments = self._transcribe(audio_source, cancel_event)
             return " ".join(segment.text.strip() for segment in segments)
         except Exception as e:
             logger.error(f"Stream transcription failed: {e}")
             return ""
 
+    def transcribe_many(
+            self,
+            sources: Sequence,
+            pool: Optional[FairScheduler] = None,
+            guild_id: int = 0
+    ) -> List[str]:
+        """
+        Transcribes several files/arrays (e.g. one per speaker) as one pool job
+        each, like process_cut. Without `pool` a temporary one with num_workers
+        workers is used. Results are returned in input order; failures yield "".
+        """
+        own_pool = pool is None
+        if own_pool:
+            pool = FairScheduler("transcribe_many", workers=self.config.num_workers)
+
+        try:
+            jobs = [
+                pool.submit(
+                    guild_id,
+                    lambda job, source=source: self.transcribe(source, job.cancel_event),
+                    Priority.INTERACTIVE,
+                    label="transcribe"
+                )
+                for source in sources
+            ]
+            return [job.future.result() for job in jobs]
+        finally:
+            if own_pool:
+                pool.shutdown()
+
+    def routing_stats(self) -> Dict[str, object]:
+        """
+        Per-tier latency and the fast-tier escalation rate.
+        """
+        with self._stats_lock:
+            tiers = [t for t in (self.fast_tier, self.main_tier) if t is not None]
+            return {
+                "tiers": {
+                    t.name: {**asdict(t.stats), "avg_latency": t.stats.avg_latency, "rtf": t.stats.rtf}
+                    for t in tiers
+                },
+                "routed_clips": self.routed_clips,
+                "escalated_clips": self.escalated_clips,
+                "escalation_rate": self.escalated_clips / self.routed_clips if self.routed_clips else 0.0,
+            }
+
     # ---------------------- INTERNAL ----------------------
 
-    def _transcribe(self, source) -> Iterable:
-        segments, info = self.model.transcribe(
-            source,
-            language=self.config.language,
-            beam_size=self.config.beam_size
+    def _transcribe(self, source, cancel_event: Optional[threading.Event] = None) -> List[TranscriptSegment]:
+        audio = source
+        if isinstance(source, str):
+            audio = decode_audio(source, sampling_rate=self.SAMPLE_RATE)
+
+        if not isinstance(audio, np.ndarray):
+            return self._transcribe_window(audio, 0.0, cancel_event)
+
+        routed = self._should_route(audio)
+
+        key = self._cache_key(audio, routed)
+        if key is not None:
+            cached = self.cache.get(key)
+            self._log_cache(hit=cached is not None)
+            if cached is not None:
+                return [TranscriptSegment(**segment) for segment in cached]
+
+        if routed:
+            segments = self._transcribe_routed(audio, cancel_event)
+        elif len(audio) > self.config.chunk_min_seconds * self.SAMPLE_RATE:
+            segments = self._transcribe_chunked(audio, cancel_event)
+        else:
+            segments = self._transcribe_window(audio, 0.0, cancel_event)
+
+        # a cancelled run is partial and must not be served later
+        if key is not None and not (cancel_event is not None and cancel_event.is_set()):
+            self.cache.put(key, [asdict(segment) for segment in segments])
+
+        return segments
+
+    def _cache_key(self, audio: np.ndarray, routed: bool) -> Optional[str]:
+        if self.cache is None:
+            return None
+
+        routing = None
+        if routed:
+            routing = (
+                self.fast_tier.name,
+                self.fast_tier.beam_size,
+                self.config.escalate_logprob,
+                self.config.escalate_no_speech,
+                self.config.escalate_whole_ratio
+            )
+
+        # batching and silence splitting change segment boundaries, hence the text
+        chunking = (
+            self.config.chunk_min_seconds,
+            self.config.chunk_target_seconds,
+            self.config.chunk_max_seconds
+        )
+
+        pcm = np.ascontiguousarray(audio, dtype=np.float32)
+        return DiskCache.key(
+            self.CACHE_VERSION,
+            hashlib.sha256(pcm.data).hexdigest(),
+            self.config.model_size,
+            routing,
+            self.config.language,
+            self.config.beam_size,
+            self.config.compute_type,
+            self.config.batch_size if self.batched else 1,
+            chunking
+        )
+
+    def _log_cache(self, hit: bool):
+        stats = self.cache.stats
+        logger.info(
+            f"Transcript cache {'hit' if hit else 'miss'} "
+            f"(hit rate {stats.hit_rate:.0%}, {stats.hits}/{stats.hits + stats.misses}, "
+            f"{stats.entries} entries, {stats.size_bytes / 1024 / 1024:.1f} MB)"
+        )
+
+    def _transcribe_chunked(self, audio: np.ndarray, cancel_event=None) -> List[TranscriptSegment]:
+        """
+        Splits long audio at silences, transcribes the windows in parallel
+        and stitches the segments back on one timeline.
+        """
+        windows = split_on_silence(
+            audio,
+            self.SAMPLE_RATE,
+            target_seconds=self.config.chunk_target_seconds,
+            max_seconds=self.config.chunk_max_seconds
+        )
+
+        logger.info(
+            f"Long input ({len(audio) / self.SAMPLE_RATE:.0f}s) split into "
+            f"{len(windows)} windows"
+        )
+
+        def run(bounds):
+            start, end = bounds
+            return self._transcribe_window(audio[start:end], start / self.SAMPLE_RATE, cancel_event)
+
+        workers = min(len(windows), max(self.config.num_workers, 1))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper-window") as pool:
+            per_window = list(pool.map(run, windows))
+
+        return self._stitch(per_window)
+
+    def _load_model(self, size: str) -> WhisperModel:
+        logger.info(f"Loading Whisper model '{size}' on {self.config.device}...")
+
+        return WhisperModel(
+            size,
+            device=self.config.device,
+            compute_type=self.config.compute_type,
+            cpu_threads=self.config.cpu_threads,
+            num_workers=self.config.num_workers
+        )
+
+    def _should_route(self, audio: np.ndarray) -> bool:
+        if self.fast_tier is None or not len(audio):
+            return False
+
+        # long inputs take the chunked path on the main model
+        if len(audio) > self.config.chunk_min_seconds * self.SAMPLE_RATE:
+            return False
+
+        if len(audio) <= self.config.route_max_seconds * self.SAMPLE_RATE:
+            return True
+
+        rms = float(np.sqrt(np.mean(np.square(audio, dtype=np.float64))))
+        return rms < self.config.route_max_rms
+
+    def _needs_escalation(self, segment: TranscriptSegment) -> bool:
+        return (
+            segment.avg_logprob < self.config.escalate_logprob
+            or segment.no_speech_prob > self.config.escalate_no_speech
+        )
+
+    def _transcribe_routed(self, audio: np.ndarray, cancel_event=None) -> List[TranscriptSegment]:
+        """
+        Fast model first; low-confidence segments are redone with the main model.
+        """
+        segments = self._transcribe_window(audio, 0.0, cancel_event, tier=self.fast_tier)
+
+        spans = self._escalation_spans(segments, len(audio))
+        escalated = sum(end - start for start, end in spans)
+
+        with self._stats_lock:
+            self.routed_clips += 1
+            self.escalated_clips += bool(spans)
+            rate = self.escalated_clips / self.routed_clips
+
+        logger.info(
+            f"Routed {len(audio) / self.SAMPLE_RATE:.1f}s clip to '{self.fast_tier.name}', "
+            f"escalating {escalated / self.SAMPLE_RATE:.1f}s (escalation rate {rate:.0%})"
         )
 
+        if not spans:
+            return segments
+
+        if escalated > self.config.escalate_whole_ratio * len(audio):
+            return self._transcribe_window(audio, 0.0, cancel_event)
+
+        redone = [
+            self._transcribe_window(audio[start:end], start / self.SAMPLE_RATE, cancel_event)
+            for start, end in spans
+        ]
+        return self._merge_escalated(segments, spans, redone)
+
+    def _escalation_spans(self, segments: List[TranscriptSegment], total: int, pad: float = 0.2):
+        """
+        Merged sample ranges covering the low-confidence segments. The `pad`
+        seconds around each only extend into gaps, never into a kept segment.
+        """
+        kept = [self._sample_range(s) for s in segments if not self._needs_escalation(s)]
+
+        spans = []
+        for segment in segments:
+            if not self._needs_escalation(segment):
+                continue
+
+            seg_start, seg_end = self._sample_range(segment)
+            lower = max((end for _, end in kept if end <= seg_start), default=0)
+            upper = min((start for start, _ in kept if start >= seg_end), default=total)
+
+            start = max(lower, int((segment.start - pad) * self.SAMPLE_RATE), 0)
+            end = min(upper, int((segment.end + pad) * self.SAMPLE_RATE), total)
+
+            if spans and start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(end, spans[-1][1]))
+            else:
+                spans.append((start, end))
+
+        return spans
+
+    def _merge_escalated(
+            self,
+            segments: List[TranscriptSegment],
+            spans: List[tuple],
+            redone: List[List[TranscriptSegment]]
+    ) -> List[TranscriptSegment]:
+        """
+        Fast-tier segments outside every span plus the re-decoded spans, in
+        time order. A fast segment overlapping a span is dropped, as its words
+        are in the re-decoded audio.
+        """
+        def escalated(segment: TranscriptSegment) -> bool:
+            seg_start, seg_end = self._sample_range(segment)
+            return any(seg_start < end and seg_end > start for start, end in spans)
+
+        result = [s for s in segments if not escalated(s)]
+        for window in redone:
+            result += window
+
+        result.sort(key=lambda s: s.start)
+        return result
+
+    def _sample_range(self, segment: TranscriptSegment):
+        return int(segment.start * self.SAMPLE_RATE), int(segment.end * self.SAMPLE_RATE)
+
+    def _transcribe_window(
+            self,
+            audio,
+            offset: float,
+            cancel_event=None,
+            tier: Optional[ModelTier] = None
+    ) -> List[TranscriptSegment]:
+        tier = tier or self.main_tier
+        started = time.perf_counter()
+
+        if tier is self.main_tier and self.batched:
+            segments, info = self.batched.transcribe(
+                audio,
+                language=self.config.language,
+                beam_size=tier.beam_size,
+                batch_size=self.config.batch_size
+            )
+        else:
+            segments, info = tier.model.transcribe(
+                audio,
+                language=self.config.language,
+                beam_size=tier.beam_size
+            )
+
         logger.info(f"Audio duration: {info.duration:.2f}s")
 
-        return list(segments)
+        # segments decode lazily, so a cancelled job stops between segments
+        result = []
+        for segment in segments:
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info("Transcription cancelled")
+                break
+
+            result.append(TranscriptSegment(
+                start=segment.start + offset,
+                end=segment.end + offset,
+                text=segment.text,
+                avg_logprob=segment.avg_logprob,
+                no_speech_prob=segment.no_speech_prob
+            ))
+
+        with self._stats_lock:
+            tier.stats.calls += 1
+            tier.stats.seconds += time.perf_counter() - started
+            tier.stats.audio_seconds += info.duration
+
+        return result
+
+    @staticmethod
+    def _stitch(per_window: List[List[TranscriptSegment]]) -> List[TranscriptSegment]:
+        """
+        Concatenates window results, dropping segments repeated across a boundary.
+        """
+        stitched: List[TranscriptSegment] = []
+
+        for segments in per_window:
+            for i, segment in enumerate(segments):
+                # windows do not overlap, but a sentence cut at a boundary can be repeated
+                if stitched and i == 0 and _normalize(segment.text) == _normalize(stitched[-1].text):
+                    continue
+                stitched.append(segment)
+
+        return stitched
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split()).strip(" .,!?…")
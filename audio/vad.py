@@ -0,0 +1,127 @@
+import array
+import bisect
+import collections
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------- TIMELINE ----------------------
+
+class SpeechTimeline:
+    """
+    Compact offset map from a spooled stream back to wall-clock time.
+
+    Only discontinuities are stored: an anchor is added whenever the next
+    frame does not directly follow the previous one in real time
+    (VAD drops, Discord silence suppression, network gaps).
+    """
+
+    def __init__(self, tolerance: float = 0.1):
+        self.tolerance = tolerance
+
+        self._offsets = array.array("d")  # seconds of stream audio
+        self._walls = array.array("d")    # unix time at that offset
+
+        self.duration = 0.0
+
+    def append(self, frame_seconds: float, wall_time: float) -> None:
+        if self._walls:
+            expected = self._walls[-1] + (self.duration - self._offsets[-1])
+            if abs(wall_time - expected) > self.tolerance:
+                self._add_anchor(wall_time)
+        else:
+            self._add_anchor(wall_time)
+
+        self.duration += frame_seconds
+
+    def wall_time_at(self, offset: float) -> float:
+        """
+        Converts an offset in the stream (seconds) to unix time.
+        """
+        if not self._offsets:
+            raise ValueError("timeline is empty")
+
+        idx = max(bisect.bisect_right(self._offsets, offset) - 1, 0)
+        return self._walls[idx] + (offset - self._offsets[idx])
+
+    @property
+    def anchors(self) -> List[Tuple[float, float]]:
+        return list(zip(self._offsets, self._walls))
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _add_anchor(self, wall_time: float) -> None:
+        self._offsets.append(self.duration)
+        self._walls.append(wall_time)
+
+
+# ---------------------- VAD GATE ----------------------
+
+class VoiceActivityGate:
+    """
+    Drops non-speech 48 kHz stereo PCM frames using webrtcvad.
+
+    `padding_frames` of audio preceding speech and `hangover_frames` after it
+    are kept so words are not clipped at the edges.
+    """
+
+    SAMPLE_RATE = 48000
+    VALID_FRAME_MS = (10, 20, 30)
+
+    def __init__(self, aggressiveness: int = 2, padding_frames: int = 10, hangover_frames: int = 15):
+        import webrtcvad
+
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.hangover_frames = hangover_frames
+
+        self._preroll = collections.deque(maxlen=padding_frames)
+        self._hangover = 0
+
+        self.frames_in = 0
+        self.frames_kept = 0
+
+    def process(self, pcm: bytes, wall_time: float) -> List[Tuple[bytes, float]]:
+        """
+        Returns the frames (with their receive time) that should be stored.
+        """
+        self.frames_in += 1
+
+        if self._is_speech(pcm):
+            kept = list(self._preroll)
+            kept.append((pcm, wall_time))
+            self._preroll.clear()
+            self._hangover = self.hangover_frames
+
+        elif self._hangover > 0:
+            kept = [(pcm, wall_time)]
+            self._hangover -= 1
+
+        else:
+            self._preroll.append((pcm, wall_time))
+            kept = []
+
+        self.frames_kept += len(kept)
+        return kept
+
+    @property
+    def silence_ratio(self) -> float:
+        if not self.frames_in:
+            return 0.0
+        return 1.0 - self.frames_kept / self.frames_in
+
+    def _is_speech(self, pcm: bytes) -> bool:
+        # webrtcvad wants mono: the left channel is enough for a decision
+        mono = array.array("h", pcm)[::2].tobytes()
+        frame_ms = len(mono) // 2 * 1000 // self.SAMPLE_RATE
+
+        if frame_ms not in self.VALID_FRAME_MS:
+            return True
+
+        try:
+            return self.vad.is_speech(mono, self.SAMPLE_RATE)
+        except Exception as e:
+            logger.debug(f"VAD rejected frame: {e}")
+            return True
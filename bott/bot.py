@@ -1,20 +1,39 @@
+import asyncio
+import logging
 import os
+import time
+
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
 
 from ai.ai_manager import initialize_ai
+from ai.engine.scheduler import InferenceSchedulerConfig
+from audio.sink import SpoolSyncTimeout
 from core.session_manager import SessionManager
 from core.orchestrator import ScribeOrchestrator
+from core.rolling_summary import RollingSummaryConfig
+from core.scheduling import Priority
+from core.streaming import StreamingConfig
 from typing import Callable, Awaitable
 
 from bott.commands import join, cut, summarize, ask, stop
 
+STARTED_AT = time.monotonic()
+
 # ---------------- ENV ----------------
 
 load_dotenv()
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 TOKEN = os.getenv("DISCORD_TOKEN")
+STREAMING = os.getenv("STREAMING_TRANSCRIPTION", "1") == "1"
+ROLLING_SUMMARY = os.getenv("ROLLING_SUMMARY", "1") == "1"
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "8"))
 
 # ------------ Bot Class --------------
 
@@ -23,6 +42,11 @@ class ScribeBot(commands.Bot):
     orchestrator: ScribeOrchestrator
     auto_cut_callback: Callable[[int], Awaitable[None]]
 
+    async def setup_hook(self):
+        logging.info(f"⏱️ Logged in after {time.monotonic() - STARTED_AT:.1f}s")
+        # models load in the background; /join works right away
+        self.orchestrator.services.start()
+
 # ---------------- BOT ----------------
 
 intents = discord.Intents.default()
@@ -37,15 +61,18 @@ ai = initialize_ai()
 session_manager = SessionManager()
 
 orchestrator = ScribeOrchestrator(
-    ai.transcriber,
-    ai.analyst,
-    ai.memory,
-    session_manager
+    ai,
+    session_manager,
+    streaming=StreamingConfig() if STREAMING else None,
+    rolling_summary=RollingSummaryConfig() if ROLLING_SUMMARY else None,
+    inference=InferenceSchedulerConfig(max_queue=LLM_MAX_QUEUE)
 )
 
 bot.session_manager = session_manager
 bot.orchestrator = orchestrator
 
+logging.info(f"⏱️ Services created in {time.monotonic() - STARTED_AT:.1f}s")
+
 # ---------------- EVENTS ----------------
 
 @bot.event
@@ -53,6 +80,10 @@ async def on_ready():
     print(f"✅ Logged in as {bot.user}")
     await bot.tree.sync()
     print("🌐 Slash commands synced.")
+    logging.info(
+        f"⏱️ Ready after {time.monotonic() - STARTED_AT:.1f}s, "
+        f"AI services: {bot.orchestrator.services.status()}"
+    )
 
 async def auto_cut_callback(guild_id: int):
     guild = bot.get_guild(guild_id)
@@ -61,8 +92,14 @@ async def auto_cut_callback(guild_id: int):
     if not guild or not sink:
         return
 
-    files = sink.save_and_clear_buffers()
-    await bot.orchestrator.process_cut(guild, files)
+    try:
+        streams = await asyncio.get_running_loop().run_in_executor(None, sink.take_cut)
+    except SpoolSyncTimeout as e:
+        # the streams stay in the sink for the next cut
+        logging.error(f"Auto-cut for guild {guild_id} failed: {e}")
+        return
+
+    await bot.orchestrator.process_cut(guild, streams, priority=Priority.BACKGROUND)
 
 bot.auto_cut_callback = auto_cut_callback
 # ---------------- COMMAND REGISTRATION ----------------
@@ -96,4 +133,5 @@ bot.tree.command(
 if not TOKEN:
     raise RuntimeError("DISCORD_TOKEN not found")
 
-bot.run(TOKEN)
+# root logging is configured above; discord.py logs through it
+bot.run(TOKEN, log_handler=None)
@@ -1,5 +1,7 @@
 import discord
 
+from bott.readiness import ensure_services
+
 
 async def run(
     interaction: discord.Interaction,
@@ -10,6 +12,9 @@ async def run(
 
     await interaction.response.defer()
 
+    if not await ensure_services(interaction, "memory"):
+        return
+
     filter_user = user.display_name if user else None
     results = await bot.orchestrator.search(query, filter_user)
 
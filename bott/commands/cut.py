@@ -1,7 +1,11 @@
+import asyncio
 import os
 import time
 import discord
 
+from audio.sink import SpoolSyncTimeout
+from bott.readiness import ensure_services
+
 
 async def run(interaction: discord.Interaction):
     bot = interaction.client
@@ -19,9 +23,18 @@ async def run(interaction: discord.Interaction):
         await interaction.followup.send("⚠️ Not listening.")
         return
 
-    files = sink.save_and_clear_buffers()
+    # on failure the audio stays in the sink
+    if not await ensure_services(interaction, "transcriber"):
+        return
+
+    # waits for the spool writer; keep it off the event loop
+    try:
+        streams = await asyncio.get_running_loop().run_in_executor(None, sink.take_cut)
+    except SpoolSyncTimeout:
+        await interaction.followup.send("⚠️ Audio is still being written to disk, try again shortly.")
+        return
 
-    text = await bot.orchestrator.process_cut(interaction.guild, files)
+    text = await bot.orchestrator.process_cut(interaction.guild, streams)
 
     bot.session_manager.reset_cut_timer(
         guild_id,
@@ -1,8 +1,6 @@
-import os
-import shutil
 import discord
 from discord.ext import voice_recv
-from audio.sink import ScribeSink
+from audio.sink import ScribeSink, prune_guild_spool
 
 
 async def run(interaction: discord.Interaction):
@@ -19,20 +17,24 @@ async def run(interaction: discord.Interaction):
         await interaction.followup.send("⚠️ Guild not found.")
         return
 
+    # the previous session's untranscribed audio is archived, not deleted
+    bot.orchestrator.stop_session(guild_id)
+
     bot.session_manager.clear(guild_id)
+    bot.orchestrator.reset_session(guild_id)
 
-    if os.path.exists("temp_pcm"):
-        shutil.rmtree("temp_pcm")
-    os.makedirs("temp_pcm", exist_ok=True)
+    await bot.orchestrator.retire_sink(guild_id)
+    prune_guild_spool(guild_id)
 
     if interaction.guild.voice_client:
         await interaction.guild.voice_client.disconnect()
 
     vc = await interaction.user.voice.channel.connect(cls=voice_recv.VoiceRecvClient)
 
-    sink = ScribeSink()
+    sink = ScribeSink(guild_id)
     bot.session_manager.register_sink(guild_id, sink)
     vc.listen(sink)
+    bot.orchestrator.start_streaming(interaction.guild)
 
     bot.session_manager.reset_cut_timer(
         guild_id,
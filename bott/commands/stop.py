@@ -9,7 +9,8 @@ async def run(interaction: discord.Interaction):
         await interaction.response.send_message("⚠️ Guild not found.", ephemeral=True)
         return
 
-    bot.session_manager.remove_sink(guild_id)
+    bot.orchestrator.stop_session(guild_id)
+    await bot.orchestrator.retire_sink(guild_id)
 
     if interaction.guild.voice_client:
         await interaction.guild.voice_client.disconnect()
@@ -1,5 +1,13 @@
+import asyncio
+import time
+
 import discord
-from bott.embeds import create_session_report_embed
+from bott.embeds import create_session_report_embed, format_review_progress
+from bott.readiness import ensure_services
+from core.scheduling import JobCancelled, QueueFull
+
+# Discord rate-limits message edits; keep progress updates at most this often
+EDIT_INTERVAL = 1.5
 
 
 async def run(interaction: discord.Interaction):
@@ -7,12 +15,15 @@ async def run(interaction: discord.Interaction):
     guild_id = interaction.guild_id
 
     await interaction.response.defer()
-    await interaction.followup.send("🧠 Analyzing session...")
+    status = await interaction.followup.send("🧠 Analyzing session...")
 
     if not interaction.guild:
         await interaction.followup.send("⚠️ Guild not found.")
         return
 
+    if not await ensure_services(interaction, "analyst", "memory"):
+        return
+
     members = []
     if interaction.user.voice:
         members = [
@@ -21,11 +32,41 @@ async def run(interaction: discord.Interaction):
             if not m.bot
         ]
 
-    result = await bot.orchestrator.summarize(
-        guild_id,
-        interaction.user.name,
-        members
-    )
+    reviews = []
+    last_edit = 0.0
+    edit_lock = asyncio.Lock()
+
+    async def on_review(review: dict):
+        nonlocal last_edit
+        reviews.append(review)
+
+        async with edit_lock:
+            if time.monotonic() - last_edit < EDIT_INTERVAL:
+                return
+            last_edit = time.monotonic()
+            await _edit(status, content=format_review_progress(reviews))
+
+    async def on_position(position):
+        async with edit_lock:
+            if position is None:
+                await _edit(status, content="🧠 Analyzing session...")
+            else:
+                await _edit(status, content=f"⏳ Queued for analysis — position {position + 1}")
+
+    try:
+        result = await bot.orchestrator.summarize(
+            guild_id,
+            interaction.user.name,
+            members,
+            on_review=on_review,
+            on_position=on_position
+        )
+    except QueueFull:
+        await _edit(status, content="🚦 Analysis queue is full, try again in a few minutes.")
+        return
+    except JobCancelled:
+        await _edit(status, content="🛑 Analysis cancelled.")
+        return
 
     if not result:
         await interaction.followup.send("📭 Transcript empty.")
@@ -34,4 +75,18 @@ async def run(interaction: discord.Interaction):
     analysis, log_id = result
 
     embed = create_session_report_embed(analysis, members, log_id)
-    await interaction.followup.send(embed=embed)
+
+    # the interaction token expires after 15 minutes; fall back to the channel
+    async with edit_lock:
+        if not await _edit(status, content=None, embed=embed):
+            await interaction.channel.send(embed=embed)
+
+
+async def _edit(message, **fields) -> bool:
+    if message is None:
+        return False
+    try:
+        await message.edit(**fields)
+        return True
+    except discord.HTTPException:
+        return False
@@ -24,7 +24,7 @@ def create_session_report_embed(full_analysis, channel_members, session_id):
         if isinstance(title, list):
             title = title[0]
 
-        mark = r.get("mark", "-")
+        mark = format_mark(r)
 
         arguments = r.get("arguments", [])
         if isinstance(arguments, str):
@@ -40,3 +40,31 @@ def create_session_report_embed(full_analysis, channel_members, session_id):
 
     embed.set_footer(text=f"Session ID: {session_id}")
     return embed
+
+
+def format_mark(review) -> str:
+    """
+    The review's score; "-" when the model gave none (`mark` is nullable).
+    """
+    mark = review.get("mark")
+    if mark is None:
+        return "-"
+    if isinstance(mark, float) and mark.is_integer():
+        return str(int(mark))
+    return str(mark)
+
+
+def format_review_progress(reviews, limit: int = 1900) -> str:
+    """
+    Plain-text progress message listing the reviews found so far.
+    """
+    lines = [f"🧠 Analyzing session... {len(reviews)} topic(s) so far"]
+
+    for r in reviews:
+        line = f"• **{r.get('title', 'Unknown')}** ({format_mark(r)}/10) — {r.get('speaker', '?')}"
+        if sum(len(l) + 1 for l in lines) + len(line) > limit:
+            lines.append("…")
+            break
+        lines.append(line)
+
+    return "\n".join(lines)
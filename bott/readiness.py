@@ -0,0 +1,31 @@
+import discord
+
+SERVICE_LABELS = {
+    "transcriber": "speech model",
+    "analyst": "language model",
+    "memory": "memory database",
+}
+
+
+async def ensure_services(interaction: discord.Interaction, *names: str) -> bool:
+    """
+    Tells the user when a command has to wait for models that are still loading.
+    Returns False if a required service failed to load and the command should stop.
+    """
+    services = interaction.client.orchestrator.services
+
+    if services.is_ready(*names):
+        return True
+
+    status = services.status()
+    failed = [SERVICE_LABELS.get(n, n) for n in names if status.get(n) == "failed"]
+    if failed:
+        await interaction.followup.send(f"⚠️ The {', '.join(failed)} failed to load. Check the logs.")
+        return False
+
+    loading = [SERVICE_LABELS.get(n, n) for n in names if status.get(n) != "ready"]
+    await interaction.followup.send(
+        f"⏳ The {', '.join(loading)} is still warming up — "
+        f"your request is queued and will run once it is ready."
+    )
+    return True
@@ -1,60 +1,334 @@
 import asyncio
+import contextlib
 import shutil
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
-from typing import List, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
 import discord
 
+from ai.engine.scheduler import InferenceScheduler, InferenceSchedulerConfig
+from audio.capture import CapturedStream
+from audio.vad import SpeechTimeline
+from core.rolling_summary import RollingSummarizer, RollingSummaryConfig
+from core.scheduling import FairScheduler, Job, JobCancelled, Priority
+from core.streaming import StreamingConfig, StreamingTranscriber
+
+CutItem = Union[CapturedStream, Tuple[int, str]]
+
+
 class ScribeOrchestrator:
 
-    def __init__(self, transcriber, analyst, memory, session_manager):
-        self.transcriber = transcriber
-        self.analyst = analyst
-        self.memory = memory
+    def __init__(
+            self,
+            services,
+            session_manager,
+            processed_dir: str = "processed",
+            archive_wav: bool = True,
+            streaming: Optional[StreamingConfig] = None,
+            transcription_workers: Optional[int] = None,
+            rolling_summary: Optional[RollingSummaryConfig] = None,
+            inference: Optional[InferenceSchedulerConfig] = None
+    ):
+        # AIContainer; models may still be loading when commands arrive
+        self.services = services
         self.session_manager = session_manager
+        self.processed_dir = processed_dir
+        self.archive_wav = archive_wav
         self.logger = logging.getLogger(__name__)
 
+        # archival WAV writing stays off the cut latency path
+        self.archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wav-archive")
+
+        # all guilds share these model workers; /cut outranks auto-cuts and streaming
+        self.transcription_pool = FairScheduler("transcribe", workers=transcription_workers or 2)
+        if transcription_workers is None:
+            # one job per transcriber worker, as tuned for this host
+            services.when_ready("transcriber", self._size_transcription_pool)
+
+        # guild -> number of cuts currently waiting on its streamed utterances
+        self._expedited: Dict[int, int] = {}
+        self._expedite_lock = threading.Lock()
+
+        # every LLM call of every guild queues here; /summarize outranks background maps
+        self.llm_scheduler = InferenceScheduler(inference)
+
+        self.streaming = None
+        if streaming:
+            self.streaming = StreamingTranscriber(
+                session_manager, self._process_item, streaming, dispose=self._dispose
+            )
+
+        # map step of /summarize, precomputed at idle priority as history grows
+        self.rolling = None
+        if rolling_summary:
+            self.rolling = RollingSummarizer(
+                services, session_manager, self.transcription_pool, self.llm_scheduler, rolling_summary
+            )
+
+    def _size_transcription_pool(self, transcriber) -> None:
+        config = getattr(transcriber, "config", None)
+        workers = getattr(config, "num_workers", None)
+        if not workers:
+            return
+
+        self.transcription_pool.resize(workers)
+        self.logger.info(f"Transcription pool sized to {workers} worker(s)")
+
+    # ---------------- STREAMING ----------------
+
+    def start_streaming(self, guild: discord.Guild) -> None:
+        if self.streaming:
+            self.streaming.watch(guild)
+
+    def reset_session(self, guild_id: int) -> None:
+        """
+        Drops per-session derived state; called when a new session starts.
+        """
+        if self.rolling:
+            self.rolling.reset(guild_id)
+
+    def stop_session(self, guild_id: int) -> None:
+        """
+        Stops background work for a guild: streaming, queued or running
+        transcriptions and LLM jobs (generation stops at the next token).
+        """
+        cancelled = self.transcription_pool.cancel_guild(guild_id)
+        if cancelled:
+            self.logger.info(f"Cancelled {cancelled} transcription job(s) for guild {guild_id}")
+
+        if self.rolling:
+            self.rolling.cancel(guild_id)
+
+        cancelled = self.llm_scheduler.cancel_guild(guild_id)
+        if cancelled:
+            self.logger.info(f"Cancelled {cancelled} LLM job(s) for guild {guild_id}")
+
+        if not self.streaming:
+            return
+
+        # keep audio that never got transcribed
+        for stream in self.streaming.unwatch(guild_id):
+            self._dispose(stream)
+
+    async def retire_sink(self, guild_id: int) -> None:
+        """
+        Removes the guild's sink and archives the audio it captured since the
+        last cut. The sink is flushed and its spooler closed first, so the cut
+        only collects complete files and cannot time out.
+        """
+        sink = self.session_manager.get_sink(guild_id)
+        self.session_manager.remove_sink(guild_id)
+
+        if not sink:
+            return
+
+        loop = asyncio.get_running_loop()
+        for stream in await loop.run_in_executor(None, sink.take_cut):
+            self._dispose(stream)
+
     # ---------------- CUT PROCESSING ----------------
 
     async def process_cut(
             self,
             guild: discord.Guild,
-            files: List[Tuple[int, str]]
+            files: Sequence[CutItem],
+            priority: Priority = Priority.INTERACTIVE
     ) -> str:
+        """
+        Transcribes a cut. Accepts in-memory CapturedStreams from
+        ScribeSink.take_cut() or (user_id, wav_path) pairs.
+        Every speaker becomes one job in the shared transcription pool.
+        """
         loop = asyncio.get_running_loop()
-        guild_id = guild.id
 
-        def task():
-            results = []
+        streamed, deferred = [], []
+        with self._expedite_streaming(guild.id, priority):
+            # queued behind the guild's streamed utterances, but not behind the wait for them
+            jobs = [self._submit_item(guild.id, item, priority) for item in files]
 
-            for user_id, filepath in files:
-                try:
-                    member = guild.get_member(user_id)
-                    name = member.display_name if member else f"User_{user_id}"
+            if self.streaming:
+                # most of the session is already transcribed; wait for the tail
+                streamed, deferred = await loop.run_in_executor(None, self.streaming.drain, guild.id)
 
-                    text = self.transcriber.transcribe_file(filepath)
+        items = list(deferred) + list(files)
+        jobs = [self._submit_item(guild.id, item, priority) for item in deferred] + jobs
 
-                    if text.strip():
-                        timestamp = datetime.now().strftime("%H:%M:%S")
-                        entry = f"[{timestamp}] {name}: {text}"
-                        self.session_manager.add_entry(guild_id, entry)
-                        results.append(f"**{name}:** {text}")
+        outcomes = await asyncio.gather(
+            *(asyncio.wrap_future(job.future) for job in jobs),
+            return_exceptions=True
+        )
 
-                    os.makedirs("processed", exist_ok=True)
-                    shutil.move(filepath, os.path.join("processed", os.path.basename(filepath)))
+        results = list(streamed)
 
-                except Exception as e:
-                    self.logger.error(f"process_cut error: {e}")
+        for item, outcome in zip(items, outcomes):
+            try:
+                if isinstance(outcome, JobCancelled):
+                    continue
+                if isinstance(outcome, Exception):
+                    self.logger.error(f"process_cut error: {outcome}")
                     continue
 
-            return "\n".join(results)
+                result = self._record(guild, *outcome)
+                if result:
+                    results.append(result)
+            finally:
+                self._dispose(item)
 
-        return await loop.run_in_executor(None, task)
+        if self.rolling:
+            self.rolling.notify(guild.id)
+
+        return "\n".join(results)
+
+    def _submit_item(
+            self,
+            guild_id: int,
+            item: CutItem,
+            priority: Priority,
+            label: str = "transcribe"
+    ) -> Job:
+        def run(job: Job):
+            # captured audio is safe on disk/in memory; queue until Whisper is loaded
+            transcriber = self.services.wait("transcriber", cancel_event=job.cancel_event)
+            job.check_cancelled()
+
+            user_id, source, timeline = self._load_item(item)
+            job.check_cancelled()
+            text = transcriber.transcribe(source, cancel_event=job.cancel_event)
+            job.check_cancelled()
+            return user_id, text, timeline
+
+        return self.transcription_pool.submit(guild_id, run, priority, label=label)
+
+    @contextlib.contextmanager
+    def _expedite_streaming(self, guild_id: int, priority: Priority):
+        """
+        While a cut waits on the guild's streamed utterances, they run at the
+        cut's priority instead of queueing behind other guilds' background work.
+        """
+        if priority >= Priority.BACKGROUND:
+            yield
+            return
+
+        with self._expedite_lock:
+            self._expedited[guild_id] = self._expedited.get(guild_id, 0) + 1
+            self.transcription_pool.promote(guild_id, priority, label="stream")
+
+        try:
+            yield
+        finally:
+            with self._expedite_lock:
+                self._expedited[guild_id] -= 1
+                if not self._expedited[guild_id]:
+                    del self._expedited[guild_id]
+
+    def _process_item(self, guild: discord.Guild, item: CutItem) -> Optional[str]:
+        """
+        Streaming path: transcribes one utterance at background priority,
+        appends it to the session history and disposes of the audio.
+        """
+        try:
+            # checked and submitted under the lock so a concurrent promotion cannot miss it
+            with self._expedite_lock:
+                priority = Priority.INTERACTIVE if guild.id in self._expedited else Priority.BACKGROUND
+                job = self._submit_item(guild.id, item, priority, label="stream")
+
+            result = self._record(guild, *job.future.result())
+
+            if result and self.rolling:
+                self.rolling.notify(guild.id)
+
+            return result
+
+        except JobCancelled:
+            return None
+
+        except Exception as e:
+            self.logger.error(f"process_cut error: {e}")
+            return None
+
+        finally:
+            self._dispose(item)
+
+    @staticmethod
+    def _load_item(item: CutItem):
+        """
+        Returns (user_id, transcriber input, timeline) for a cut item.
+        """
+        if isinstance(item, CapturedStream):
+            audio = item.load()
+            return item.user_id, audio, item.timeline
+
+        user_id, filepath = item
+        return user_id, filepath, None
+
+    def _record(
+            self,
+            guild: discord.Guild,
+            user_id: int,
+            text: str,
+            timeline: Optional[SpeechTimeline]
+    ) -> Optional[str]:
+        if not text.strip():
+            return None
+
+        member = guild.get_member(user_id)
+        name = member.display_name if member else f"User_{user_id}"
+
+        timestamp = self._speech_time(timeline).strftime("%H:%M:%S")
+        entry = f"[{timestamp}] {name}: {text}"
+        self.session_manager.add_entry(guild.id, entry)
+        return f"**{name}:** {text}"
+
+    def _dispose(self, item: CutItem) -> None:
+        """
+        Moves transcribed audio out of the way: in-memory streams are archived
+        in the background (or dropped), WAV files are moved to processed_dir.
+        """
+        try:
+            if isinstance(item, CapturedStream):
+                if self.archive_wav:
+                    self.archive_executor.submit(item.archive, self.processed_dir)
+                else:
+                    item.release()
+                return
+
+            _, filepath = item
+            os.makedirs(self.processed_dir, exist_ok=True)
+            shutil.move(filepath, os.path.join(self.processed_dir, os.path.basename(filepath)))
+
+        except Exception as e:
+            self.logger.error(f"Failed to dispose cut audio: {e}")
+
+    @staticmethod
+    def _speech_time(timeline: Optional[SpeechTimeline]) -> datetime:
+        """
+        Wall-clock time the speaker's audio starts at; falls back to now.
+        """
+        if timeline is None or not len(timeline):
+            return datetime.now()
+
+        return datetime.fromtimestamp(timeline.wall_time_at(0.0))
 
     # ---------------- SUMMARIZE ----------------
 
-    async def summarize(self, guild_id: int, user_name: str, speakers: list[str] | None = None):
+    async def summarize(
+            self,
+            guild_id: int,
+            user_name: str,
+            speakers: list[str] | None = None,
+            on_review: Optional[Callable[[dict], Awaitable[None]]] = None,
+            on_position: Optional[Callable[[Optional[int]], Awaitable[None]]] = None
+    ):
+        """
+        Runs the analysis; `on_review` is awaited for every review as the
+        model produces it (before the full result is available), `on_position`
+        with the number of LLM jobs ahead while the analysis is queued and
+        with None once it starts.
+        Raises QueueFull when the LLM queue is full and JobCancelled on /stop.
+        """
         history = self.session_manager.get_history(guild_id)
 
         if not history:
@@ -63,16 +337,37 @@ class ScribeOrchestrator:
         loop = asyncio.get_running_loop()
         full_text = "\n".join(history)
 
+        analyst = await self.services.wait_async("analyst")
+        memory = await self.services.wait_async("memory")
+
+        progress = None
+        if on_review is not None:
+            # called on the inference thread; hand each review to the event loop
+            def progress(review: dict):
+                asyncio.run_coroutine_threadsafe(on_review(review), loop)
+
         def analysis():
-            return self.analyst.smart_summarize(full_text)
+            if self.rolling:
+                return self.rolling.finish(guild_id, progress)
+            return analyst.smart_summarize(full_text, progress)
 
-        result = await loop.run_in_executor(None, analysis)
+        job = self.llm_scheduler.submit(guild_id, lambda _: analysis(), Priority.INTERACTIVE, label="summarize")
+        result = await self._await_job(job, on_position)
+
+        # same transcript and analysis as an earlier /summarize: already stored
+        log_id = await loop.run_in_executor(None, memory.find_session_log, full_text, result)
+        if log_id:
+            self.logger.info(f"Session log {log_id} already archived; skipping storage")
+            return result, log_id
 
         # ---------- COLD STORAGE ----------
-        log_id = self.memory.archive_session_log(
-            transcript=full_text,
-            analysis=result,
-            user_name=user_name
+        log_id = await loop.run_in_executor(
+            None,
+            lambda: memory.archive_session_log(
+                transcript=full_text,
+                analysis=result,
+                user_name=user_name
+            )
         )
 
         # ---------- VECTOR STORAGE ----------
@@ -83,7 +378,7 @@ class ScribeOrchestrator:
                     reviews = [reviews]
 
                 for review in reviews:
-                    self.memory.store_insights(
+                    memory.store_insights(
                         analysis_item=review,
                         original_transcription=full_text,
                         speaker_id=", ".join(speakers),
@@ -94,13 +389,37 @@ class ScribeOrchestrator:
 
         return result, log_id
 
+    async def _await_job(
+            self,
+            job: Job,
+            on_position: Optional[Callable[[Optional[int]], Awaitable[None]]],
+            poll_interval: float = 2.0
+    ):
+        future = asyncio.wrap_future(job.future)
+        last = None
+
+        while True:
+            position = self.llm_scheduler.position(job)
+
+            if on_position is not None and position != last:
+                last = position
+                await on_position(position)
+
+            if position is None:
+                return await future
+
+            done, _ = await asyncio.wait({future}, timeout=poll_interval)
+            if done:
+                return future.result()
+
     # ---------------- SEARCH ----------------
 
     async def search(self, query: str, filter_user: str | None = None):
         loop = asyncio.get_running_loop()
+        memory = await self.services.wait_async("memory")
 
         def task():
-            return self.memory.search(
+            return memory.search(
                 query_text=query,
                 filter_user=filter_user,
                 n_results=3
@@ -0,0 +1,229 @@
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ai.engine.scheduler import InferenceScheduler
+from core.scheduling import FairScheduler, Job, Priority, QueueFull
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- CONFIG ----------------
+
+@dataclass
+class RollingSummaryConfig:
+    # background map jobs wait while the transcription pool has work at or
+    # above this priority (INTERACTIVE: only /cut, BACKGROUND: also auto-cuts/streaming)
+    yield_to: Priority = Priority.BACKGROUND
+    yield_poll_interval: float = 0.5
+
+
+@dataclass
+class GuildNotes:
+    # notes from mapped chunks, in order
+    notes: List[str] = field(default_factory=list)
+    # turns not yet covered by a full chunk (includes the overlap turns)
+    backlog: List[str] = field(default_factory=list)
+    # history entries already moved into the backlog
+    consumed: int = 0
+    # bumped whenever notes/backlog are rebuilt, so stale map results are dropped
+    generation: int = 0
+    job: Optional[Job] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+# ---------------- ROLLING SUMMARY ----------------
+
+class RollingSummarizer:
+    """
+    Runs the map step of the summary in the background as history grows.
+
+    Whenever a guild's unmapped history fills a chunk, an IDLE job maps the
+    full chunks and keeps their notes; /summarize then only maps the
+    remaining tail and runs the final reduce. The LLM calls themselves go
+    through the shared inference scheduler, behind any interactive work.
+    """
+
+    def __init__(
+            self,
+            services,
+            session_manager,
+            transcription_pool: FairScheduler,
+            llm_scheduler: InferenceScheduler,
+            config: Optional[RollingSummaryConfig] = None
+    ):
+        self.services = services
+        self.session_manager = session_manager
+        self.transcription_pool = transcription_pool
+        self.llm_scheduler = llm_scheduler
+        self.config = config or RollingSummaryConfig()
+
+        self.pool = FairScheduler("rolling-summary", workers=1)
+        self._guilds: Dict[int, GuildNotes] = {}
+        self._lock = threading.Lock()
+
+    # ---------------- PUBLIC API ----------------
+
+    def notify(self, guild_id: int) -> None:
+        """
+        Called after new history entries; schedules a map job if a chunk is full.
+        """
+        if not self.services.is_ready("analyst"):
+            return
+
+        state = self._state(guild_id)
+
+        with self._lock:
+            if state.job is not None and not state.job.future.done():
+                return
+
+            # cheap pre-check: a token is at least one char, so fewer chars cannot fill a chunk
+            history = self.session_manager.get_history(guild_id)
+            pending = sum(len(entry) for entry in history[state.consumed:])
+            pending += sum(len(piece) for piece in state.backlog)
+
+            budget = self.services.get("analyst").chunker.max_tokens
+            if pending < budget:
+                return
+
+            state.job = self.pool.submit(
+                guild_id,
+                lambda job: self._map_full_chunks(guild_id, job),
+                Priority.IDLE,
+                label="rolling-map"
+            )
+
+    def finish(self, guild_id: int, on_review: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Maps whatever is left (normally at most one chunk) and runs the reduce.
+        Blocking; runs as an inference scheduler job.
+        """
+        analyst = self.services.wait("analyst")
+        state = self._state(guild_id)
+
+        with state.lock:
+            history = self.session_manager.get_history(guild_id)
+
+            # unchanged since the last /summarize: no LLM work at all
+            cached = analyst.cached_analysis("\n".join(history), on_review)
+            if cached is not None:
+                return cached
+
+            self._absorb(state, history, analyst)
+
+            if not state.notes:
+                # nothing precomputed: the analyst decides between direct and map-reduce
+                return analyst.smart_summarize("\n".join(history), on_review)
+
+            start = time.time()
+            ranges = analyst.chunker.pack(state.backlog)
+            tail = ["\n".join(state.backlog[a:b]) for a, b in ranges]
+            notes = state.notes + analyst.map_chunks(tail)
+
+            logger.info(
+                f"Summary for guild {guild_id}: {len(state.notes)} precomputed notes, "
+                f"{len(tail)} catch-up chunk(s) in {time.time() - start:.2f}s"
+            )
+
+            result = analyst.reduce(notes, on_review)
+            analyst.store_analysis("\n".join(history), result)
+            return result
+
+    def reset(self, guild_id: int) -> None:
+        with self._lock:
+            state = self._guilds.pop(guild_id, None)
+
+        if state and state.job is not None:
+            self.pool.cancel(state.job)
+
+    def cancel(self, guild_id: int) -> None:
+        """
+        Stops a queued or running map job; notes mapped so far are kept.
+        """
+        with self._lock:
+            state = self._guilds.get(guild_id)
+
+        if state and state.job is not None:
+            self.pool.cancel(state.job)
+
+    def close(self) -> None:
+        self.pool.shutdown()
+
+    # ---------------- INTERNAL ----------------
+
+    def _state(self, guild_id: int) -> GuildNotes:
+        with self._lock:
+            return self._guilds.setdefault(guild_id, GuildNotes())
+
+    @staticmethod
+    def _absorb(state: GuildNotes, history: List[str], analyst) -> None:
+        if len(history) < state.consumed:
+            # history was cleared underneath us: start over
+            state.notes.clear()
+            state.backlog.clear()
+            state.consumed = 0
+            state.generation += 1
+
+        for entry in history[state.consumed:]:
+            state.backlog.extend(analyst.chunker.pieces(entry))
+        state.consumed = len(history)
+
+    def _map_full_chunks(self, guild_id: int, job: Job) -> int:
+        # never compete with transcription for the CPU
+        while self.transcription_pool.busy(self.config.yield_to):
+            job.check_cancelled()
+            time.sleep(self.config.yield_poll_interval)
+
+        analyst = self.services.get("analyst")
+        state = self._state(guild_id)
+
+        with state.lock:
+            job.check_cancelled()
+            self._absorb(state, self.session_manager.get_history(guild_id), analyst)
+
+            ranges = analyst.chunker.pack(state.backlog)
+            full = ranges[:-1]
+            if not full:
+                return 0
+
+            chunks = ["\n".join(state.backlog[a:b]) for a, b in full]
+            generation = state.generation
+
+        # state.lock is not held here: finish() may be running on the LLM worker
+        notes = self._run_llm(guild_id, job, lambda _: analyst.map_chunks(chunks))
+        if notes is None:
+            return 0
+
+        with state.lock:
+            if state.generation != generation:
+                return 0
+
+            state.notes.extend(notes)
+            # the last range starts after the overlap with the previous chunk
+            state.backlog = state.backlog[ranges[-1][0]:]
+
+        logger.info(f"Rolling summary for guild {guild_id}: mapped {len(chunks)} chunk(s), "
+                    f"{len(state.notes)} notes total")
+        return len(chunks)
+
+    def _run_llm(self, guild_id: int, job: Job, fn):
+        """
+        Runs `fn` as an IDLE inference job and waits for it, passing on
+        cancellation. Returns None when the LLM queue has no room.
+        """
+        try:
+            llm_job = self.llm_scheduler.submit(guild_id, fn, Priority.IDLE, label="rolling-map")
+        except QueueFull:
+            logger.debug(f"LLM queue full; rolling summary for guild {guild_id} will retry later")
+            return None
+
+        while True:
+            try:
+                return llm_job.future.result(timeout=self.config.yield_poll_interval)
+            except FutureTimeout:
+                if job.cancelled:
+                    self.llm_scheduler.cancel(llm_job)
+                    job.check_cancelled()
@@ -0,0 +1,310 @@
+import collections
+import enum
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- JOBS ----------------
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    IDLE = 2
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass(eq=False)
+class Job:
+    guild_id: int
+    priority: Priority
+    fn: Callable[["Job"], Any]
+    label: str = ""
+
+    future: Future = field(default_factory=Future, repr=False)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """
+        Called by long-running job functions between steps.
+        """
+        if self.cancel_event.is_set():
+            raise JobCancelled(self.label)
+
+    @property
+    def wait_time(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return self.started_at - self.enqueued_at
+
+    @property
+    def service_time(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+# ---------------- SCHEDULER ----------------
+
+class FairScheduler:
+    """
+    Thread pool with strict priority classes and per-guild round robin
+    inside each class, so one busy guild cannot starve the others.
+
+    Queued jobs can be cancelled outright; running jobs get their
+    cancel_event set and are expected to call job.check_cancelled().
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int = 0, history: int = 200):
+        self.name = name
+        self.max_queue = max_queue
+        self.workers = max(workers, 1)
+
+        # priority -> guild_id -> jobs, guilds kept in round-robin order
+        self._queues: Dict[Priority, "collections.OrderedDict[int, Deque[Job]]"] = {
+            p: collections.OrderedDict() for p in Priority
+        }
+        self._running: List[Job] = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        self.finished: Deque[Job] = collections.deque(maxlen=history)
+
+        self._threads: List[threading.Thread] = []
+        with self._cond:
+            self._spawn_workers()
+
+    # ---------------- PUBLIC API ----------------
+
+    def submit(
+            self,
+            guild_id: int,
+            fn: Callable[[Job], Any],
+            priority: Priority = Priority.INTERACTIVE,
+            label: str = ""
+    ) -> Job:
+        """
+        Raises QueueFull when max_queue jobs at `priority` or above are
+        queued; lower-priority jobs never use up room for higher ones.
+        """
+        job = Job(guild_id=guild_id, priority=priority, fn=fn, label=label)
+
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError(f"{self.name} scheduler is shut down")
+
+            if self.max_queue:
+                ahead = self.pending(priority)
+                if ahead >= self.max_queue:
+                    raise QueueFull(f"{self.name} queue is full ({ahead} jobs at {priority.name} or above)")
+
+            self._queues[priority].setdefault(guild_id, collections.deque()).append(job)
+            self._size += 1
+            self._cond.notify()
+
+        return job
+
+    def cancel(self, job: Job) -> None:
+        job.cancel_event.set()
+
+        with self._cond:
+            queue = self._queues[job.priority].get(job.guild_id)
+            if queue and job in queue:
+                queue.remove(job)
+                self._size -= 1
+                if not queue:
+                    del self._queues[job.priority][job.guild_id]
+                # False if the caller already cancelled the future
+                if job.future.set_running_or_notify_cancel():
+                    job.future.set_exception(JobCancelled(job.label))
+
+    def cancel_guild(self, guild_id: int) -> int:
+        """
+        Cancels all queued and running jobs of a guild. Returns how many were hit.
+        """
+        with self._cond:
+            jobs = [j for j in self._running if j.guild_id == guild_id]
+            for per_guild in self._queues.values():
+                jobs.extend(per_guild.get(guild_id, ()))
+
+        for job in jobs:
+            self.cancel(job)
+
+        return len(jobs)
+
+    def promote(self, guild_id: int, priority: Priority, label: Optional[str] = None) -> int:
+        """
+        Moves the guild's queued jobs (optionally only those with `label`)
+        from lower classes up to `priority`, keeping their order.
+        Returns how many were moved.
+        """
+        moved = 0
+
+        with self._cond:
+            for lower in Priority:
+                if lower <= priority:
+                    continue
+
+                queue = self._queues[lower].get(guild_id)
+                if not queue:
+                    continue
+
+                jobs = [j for j in queue if label is None or j.label == label]
+                for job in jobs:
+                    queue.remove(job)
+                    job.priority = priority
+                    self._queues[priority].setdefault(guild_id, collections.deque()).append(job)
+
+                if not queue:
+                    del self._queues[lower][guild_id]
+                moved += len(jobs)
+
+            if moved:
+                self._cond.notify()
+
+        return moved
+
+    def position(self, job: Job) -> Optional[int]:
+        """
+        Number of queued jobs that will start before `job` (0 = next),
+        or None if it is no longer queued.
+        """
+        with self._cond:
+            order = self._dispatch_order()
+
+        try:
+            return order.index(job)
+        except ValueError:
+            return None
+
+    def pending(self, max_priority: Priority = Priority.IDLE) -> int:
+        with self._cond:
+            return sum(
+                len(queue)
+                for priority, per_guild in self._queues.items()
+                if priority <= max_priority
+                for queue in per_guild.values()
+            )
+
+    def busy(self, max_priority: Priority = Priority.IDLE) -> bool:
+        """
+        True while jobs up to `max_priority` are queued or running.
+        """
+        with self._cond:
+            if any(j.priority <= max_priority for j in self._running):
+                return True
+        return self.pending(max_priority) > 0
+
+    def resize(self, workers: int) -> None:
+        """
+        Changes the number of worker threads. Surplus workers exit after
+        finishing their current job.
+        """
+        with self._cond:
+            self.workers = max(workers, 1)
+            self._spawn_workers()
+            self._cond.notify_all()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    # ---------------- INTERNAL ----------------
+
+    def _dispatch_order(self) -> List[Job]:
+        order = []
+        for priority in Priority:
+            per_guild = [list(q) for q in self._queues[priority].values()]
+            # round robin: first job of every guild, then the second, ...
+            for depth in range(max((len(q) for q in per_guild), default=0)):
+                order.extend(q[depth] for q in per_guild if depth < len(q))
+        return order
+
+    def _next_job(self) -> Optional[Job]:
+        for priority in Priority:
+            per_guild = self._queues[priority]
+            if not per_guild:
+                continue
+
+            guild_id, queue = next(iter(per_guild.items()))
+            job = queue.popleft()
+
+            # rotate the guild to the back of its class
+            del per_guild[guild_id]
+            if queue:
+                per_guild[guild_id] = queue
+
+            self._size -= 1
+            return job
+
+        return None
+
+    def _spawn_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker_loop, name=f"{self.name}-{len(self._threads)}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if len(self._threads) > self.workers:
+                        self._threads.remove(threading.current_thread())
+                        return
+
+                    job = self._next_job()
+                    if job is not None:
+                        break
+                    if self._stopped:
+                        return
+                    self._cond.wait()
+
+                # the caller gave up on it, e.g. a cancelled asyncio.wrap_future
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+
+                job.started_at = time.monotonic()
+                self._running.append(job)
+
+            try:
+                job.check_cancelled()
+                job.future.set_result(job.fn(job))
+            except BaseException as e:
+                job.future.set_exception(e)
+            finally:
+                job.finished_at = time.monotonic()
+
+                with self._cond:
+                    self._running.remove(job)
+                    self.finished.append(job)
+
+                logger.info(
+                    f"[{self.name}] {job.label or 'job'} guild={job.guild_id} "
+                    f"priority={job.priority.name} wait={job.wait_time:.2f}s "
+                    f"service={job.service_time:.2f}s"
+                )
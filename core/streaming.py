@@ -0,0 +1,202 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import discord
+
+from audio.capture import CapturedStream
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- CONFIG ----------------
+
+@dataclass
+class StreamingConfig:
+    poll_interval: float = 0.25
+
+    # utterance segmentation
+    utterance_gap: float = 0.8
+    max_utterance_seconds: float = 20.0
+
+    # load shedding: utterances over these limits are left for the next /cut
+    max_queue: int = 64
+    max_lag_seconds: float = 60.0
+
+    # how long a cut waits for in-flight utterances; later ones still reach history
+    drain_timeout: float = 10.0
+
+    workers: int = 1
+
+
+# ---------------- STREAMING ----------------
+
+class StreamingTranscriber:
+    """
+    Transcribes utterances in the background while a session is recording.
+
+    A poller thread detaches finished utterances from watched sinks and
+    queues them for worker threads. Under load (queue full, or an utterance
+    waited longer than max_lag_seconds) utterances are deferred instead and
+    handed to the next cut, so recording never stalls and nothing is lost.
+    """
+
+    def __init__(
+            self,
+            session_manager,
+            handle: Callable[[discord.Guild, CapturedStream], Optional[str]],
+            config: Optional[StreamingConfig] = None,
+            dispose: Optional[Callable[[CapturedStream], None]] = None
+    ):
+        self.session_manager = session_manager
+        self.handle = handle
+        self.config = config or StreamingConfig()
+        # receives utterances deferred after their guild was unwatched (e.g. to archive them)
+        self.dispose = dispose or CapturedStream.release
+
+        self._guilds: Dict[int, discord.Guild] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=self.config.max_queue)
+
+        # per guild: transcribed texts and deferred utterances since the last drain
+        self._results: Dict[int, List[str]] = {}
+        self._deferred: Dict[int, List[CapturedStream]] = {}
+        self._in_flight: Dict[int, int] = {}
+
+        self._state = threading.Condition()
+        self._poll_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        self._threads = [threading.Thread(target=self._poll_loop, name="stream-poller", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._worker_loop, name=f"stream-worker-{i}", daemon=True)
+            for i in range(self.config.workers)
+        ]
+
+        for thread in self._threads:
+            thread.start()
+
+    # ---------------- PUBLIC API ----------------
+
+    def watch(self, guild: discord.Guild) -> None:
+        with self._state:
+            self._guilds[guild.id] = guild
+
+    def unwatch(self, guild_id: int) -> List[CapturedStream]:
+        """
+        Stops polling a guild; returns utterances that were never transcribed.
+        """
+        with self._poll_lock, self._state:
+            self._guilds.pop(guild_id, None)
+            self._results.pop(guild_id, None)
+            return self._deferred.pop(guild_id, [])
+
+    def drain(self, guild_id: int, timeout: Optional[float] = None) -> Tuple[List[str], List[CapturedStream]]:
+        """
+        Waits up to `timeout` (default: config.drain_timeout) for the guild's
+        queued utterances and returns (texts transcribed since the last drain,
+        deferred utterances). Utterances still running after that are not
+        lost: they reach the history and the next drain.
+        """
+        timeout = self.config.drain_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        # the poller holds this lock while utterances are between sink and queue;
+        # once we have it, everything taken from the sink is counted as in flight
+        with self._poll_lock:
+            pass
+
+        with self._state:
+            while self._in_flight.get(guild_id, 0) > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._state.wait(remaining)
+
+            return self._results.pop(guild_id, []), self._deferred.pop(guild_id, [])
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def close(self) -> None:
+        self._stopped.set()
+        for _ in range(self.config.workers):
+            self._queue.put(None)
+
+    # ---------------- INTERNAL ----------------
+
+    def _poll_loop(self):
+        while not self._stopped.wait(self.config.poll_interval):
+            with self._state:
+                guilds = list(self._guilds.values())
+
+            for guild in guilds:
+                sink = self.session_manager.get_sink(guild.id)
+                if not sink:
+                    continue
+
+                try:
+                    with self._poll_lock:
+                        for stream in sink.take_utterances(
+                                self.config.utterance_gap,
+                                self.config.max_utterance_seconds
+                        ):
+                            self._enqueue(guild, stream)
+                except Exception as e:
+                    logger.error(f"Utterance polling failed for guild {guild.id}: {e}")
+
+    def _enqueue(self, guild: discord.Guild, stream: CapturedStream) -> None:
+        with self._state:
+            self._in_flight[guild.id] = self._in_flight.get(guild.id, 0) + 1
+
+        try:
+            self._queue.put_nowait((guild, stream, time.monotonic()))
+        except queue.Full:
+            logger.warning("Streaming queue full, deferring utterance to next cut")
+            self._finish(guild.id, deferred=stream)
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            guild, stream, queued_at = item
+
+            if time.monotonic() - queued_at > self.config.max_lag_seconds:
+                logger.warning("Streaming transcription lagging, deferring utterance to next cut")
+                self._finish(guild.id, deferred=stream)
+                continue
+
+            text = None
+            try:
+                text = self.handle(guild, stream)
+            except Exception as e:
+                logger.error(f"Streaming transcription failed: {e}")
+            finally:
+                self._finish(guild.id, text=text)
+
+    def _finish(self, guild_id: int, text: Optional[str] = None, deferred: Optional[CapturedStream] = None):
+        orphaned = None
+
+        with self._state:
+            if guild_id in self._guilds:
+                if text:
+                    self._results.setdefault(guild_id, []).append(text)
+                if deferred:
+                    self._deferred.setdefault(guild_id, []).append(deferred)
+            else:
+                # no cut will pick it up any more
+                orphaned = deferred
+
+            self._in_flight[guild_id] -= 1
+            self._state.notify_all()
+
+        if orphaned:
+            try:
+                self.dispose(orphaned)
+            except Exception as e:
+                logger.error(f"Failed to dispose deferred utterance: {e}")
@@ -0,0 +1,182 @@
+import collections
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class DiskCache:
+    """
+    Persistent content-addressed JSON cache with size-bounded LRU eviction.
+
+    One file per entry; recency is kept in the file mtime so the LRU
+    order survives restarts. With `max_age` (seconds), entries unused for
+    longer than that are dropped as well.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            max_bytes: int = 512 * 1024 * 1024,
+            name: str = "cache",
+            max_age: Optional[float] = None
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.name = name
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._index: "collections.OrderedDict[str, int]" = collections.OrderedDict()
+        self._size = 0
+        self._stats = CacheStats()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    # ---------------- KEYS ----------------
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """
+        Stable digest of the given parts (bytes are hashed as-is, others via repr).
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part if isinstance(part, (bytes, bytearray, memoryview)) else repr(part).encode()
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    # ---------------- PUBLIC API ----------------
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+
+        with self._lock:
+            if key not in self._index:
+                self._stats.misses += 1
+                return None
+
+            if self._expired(path):
+                self._remove_locked(key)
+                self._stats.evictions += 1
+                self._stats.misses += 1
+                return None
+
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"[{self.name}] dropping unreadable entry {key[:12]}: {e}")
+                self._remove_locked(key)
+                self._stats.misses += 1
+                return None
+
+            self._index.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except OSError as e:
+                logger.warning(f"[{self.name}] write failed: {e}")
+                return
+
+            self._size += len(data) - self._index.get(key, 0)
+            self._index[key] = len(data)
+            self._index.move_to_end(key)
+            self._stats.writes += 1
+            self._evict_locked()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._index
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                writes=self._stats.writes,
+                evictions=self._stats.evictions,
+                entries=len(self._index),
+                size_bytes=self._size
+            )
+
+    # ---------------- INTERNAL ----------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _expired(self, path: str, mtime: Optional[float] = None) -> bool:
+        if self.max_age is None:
+            return False
+        try:
+            mtime = os.path.getmtime(path) if mtime is None else mtime
+        except OSError:
+            return True
+        return time.time() - mtime > self.max_age
+
+    def _load_index(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                if self._expired(entry.path, stat.st_mtime):
+                    os.remove(entry.path)
+                    continue
+                entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+
+        with self._lock:
+            self._evict_locked()
+
+    def _evict_locked(self):
+        while self._size > self.max_bytes and self._index:
+            self._remove_locked(next(iter(self._index)))
+            self._stats.evictions += 1
+
+    def _remove_locked(self, key: str):
+        self._size -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -1,4 +1,5 @@
 import chromadb
+import glob
 import hashlib
 import json
 import logging
@@ -37,8 +38,25 @@ class StorageMind:
 
     # ---------------- LOG STORAGE ----------------
 
+    @staticmethod
+    def session_log_id(transcript: str, analysis: Any) -> str:
+        """
+        Deterministic id: the same transcript and analysis always map to one log.
+        """
+        content = json.dumps([transcript, analysis], ensure_ascii=False, sort_keys=True)
+        return str(uuid.uuid5(uuid.NAMESPACE_OID, hashlib.sha256(content.encode()).hexdigest()))
+
+    def find_session_log(self, transcript: str, analysis: Any) -> Optional[str]:
+        session_id = self.session_log_id(transcript, analysis)
+        pattern = os.path.join(self.config.logs_dir, f"log_*_{session_id}.json")
+        return session_id if glob.glob(pattern) else None
+
     def archive_session_log(self, transcript: str, analysis: Any, user_name: str) -> str:
-        session_id = str(uuid.uuid4())
+        existing = self.find_session_log(transcript, analysis)
+        if existing:
+            return existing
+
+        session_id = self.session_log_id(transcript, analysis)
         timestamp = int(datetime.now().timestamp())
 
         data = {
@@ -0,0 +1,594 @@
+import os
+
+from audio.spooler import SpoolWriter
+
+
+def test_spooler_appends_in_order(tmp_path):
+    path = os.path.join(tmp_path, "stream_1.pcm")
+    writer = SpoolWriter(max_queue=4)
+
+    for i in range(20):
+        writer.submit(path, bytes([i]) * 10)
+
+    assert writer.sync(close_files=True, timeout=5)
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    assert data == b"".join(bytes([i]) * 10 for i in range(20))
+
+    stats = writer.stats
+    assert stats.bytes_written == 200
+    assert stats.bytes_pending == 0
+
+    writer.close()
+
+
+def test_spooler_close_is_idempotent(tmp_path):
+    path = os.path.join(tmp_path, "stream_2.pcm")
+    writer = SpoolWriter()
+
+    writer.submit(path, b"abc")
+    writer.close()
+    writer.close()
+
+    with open(path, "rb") as f:
+        assert f.read() == b"abc"
+
+
+def test_sink_cut_only_touches_own_guild(tmp_path):
+    from audio.sink import ScribeSink, SinkConfig
+
+    config = SinkConfig(
+        temp_dir=os.path.join(tmp_path, "temp_pcm"),
+        recordings_dir=os.path.join(tmp_path, "recordings"),
+        spool_codec="pcm"
+    )
+
+    sink_a = ScribeSink(1, config)
+    sink_b = ScribeSink(2, config)
+
+    sink_a._buffer(10, b"\x00" * 3840)
+    sink_b._buffer(20, b"\x00" * 3840)
+    sink_b.flush_all()
+
+    files = sink_a.save_and_clear_buffers()
+
+    assert [uid for uid, _ in files] == [10]
+    assert list(sink_b.open_streams) == [20]
+
+    sink_a.cleanup()
+    sink_b.cleanup()
+
+
+def test_timeline_maps_offsets_across_gaps():
+    from audio.vad import SpeechTimeline
+
+    timeline = SpeechTimeline()
+
+    # 1 s of contiguous speech, then 5 s of dropped silence, then 1 s more
+    for i in range(50):
+        timeline.append(0.02, 1000.0 + i * 0.02)
+    for i in range(50):
+        timeline.append(0.02, 1006.0 + i * 0.02)
+
+    assert len(timeline) == 2
+    assert abs(timeline.wall_time_at(0.5) - 1000.5) < 1e-6
+    assert abs(timeline.wall_time_at(1.5) - 1006.5) < 1e-6
+
+
+def test_vad_gate_drops_silence_and_keeps_speech_timed():
+    import numpy as np
+    import pytest
+    pytest.importorskip("webrtcvad")
+    from audio.vad import SpeechTimeline, VoiceActivityGate
+
+    rate, frame = 48000, 960  # 20 ms of 48 kHz stereo
+
+    def tone(i):
+        t = (np.arange(frame) + i * frame) / rate
+        mono = (8000 * np.sin(2 * np.pi * 220 * t) + 4000 * np.sin(2 * np.pi * 550 * t)).astype(np.int16)
+        return np.repeat(mono, 2).tobytes()
+
+    silence = np.zeros(frame * 2, dtype=np.int16).tobytes()
+
+    # 0.5 s silence, 0.5 s tone, 1 s silence, 0.5 s tone
+    script = ["s"] * 25 + ["t"] * 25 + ["s"] * 50 + ["t"] * 25
+    gate = VoiceActivityGate(aggressiveness=2, padding_frames=2, hangover_frames=3)
+    timeline = SpeechTimeline()
+    kept = []
+
+    for i, kind in enumerate(script):
+        for pcm, wall in gate.process(tone(i) if kind == "t" else silence, 100.0 + i * 0.02):
+            kept.append(round((wall - 100.0) / 0.02))
+            timeline.append(len(pcm) / (rate * 2 * 2), wall)
+
+    speech = [i for i, kind in enumerate(script) if kind == "t"]
+    assert set(speech) <= set(kept)
+
+    # leading silence is dropped except the padding right before speech
+    assert kept[:3] == [23, 24, 25]
+    # most of the pause is dropped (only hangover survives), then padding again
+    pause = [i for i in kept if 50 <= i < 100]
+    assert len(pause) < 15 and [98, 99] == pause[-2:]
+    assert gate.silence_ratio > 0.3
+
+    # the dropped pause becomes a timeline anchor, so offsets map back to receive time
+    resume = kept.index(98) * 0.02
+    assert timeline.anchors[0] == (0.0, 100.0 + 23 * 0.02)
+    assert len(timeline) == 2
+    assert timeline.wall_time_at(resume + 0.04) == pytest.approx(100.0 + 100 * 0.02)
+
+
+def test_downsampler_is_chunk_invariant():
+    import numpy as np
+    from audio.pcm import WhisperDownsampler
+
+    rng = np.random.default_rng(0)
+    pcm = rng.integers(-2000, 2000, size=48000 * 2, dtype=np.int16).tobytes()
+
+    whole = WhisperDownsampler().process(pcm)
+
+    chunked = WhisperDownsampler()
+    parts = [chunked.process(pcm[i:i + 3844]) for i in range(0, len(pcm), 3844)]
+
+    assert len(whole) == 16000 * 2
+    assert b"".join(parts) == whole
+
+
+def test_take_cut_hands_over_float_audio(tmp_path):
+    import wave
+    from audio.sink import ScribeSink, SinkConfig
+
+    config = SinkConfig(temp_dir=os.path.join(tmp_path, "temp_pcm"), spool_codec="pcm")
+    sink = ScribeSink(1, config)
+
+    for _ in range(50):  # 1 s of 48 kHz stereo
+        sink._buffer(10, b"\x00\x10" * 1920)
+
+    [stream] = sink.take_cut()
+    audio = stream.load()
+
+    assert audio.dtype.name == "float32"
+    assert len(audio) == 16000
+
+    wav_path = stream.archive(os.path.join(tmp_path, "processed"))
+
+    with wave.open(wav_path) as wf:
+        assert (wf.getnchannels(), wf.getframerate()) == (1, 16000)
+    assert not os.path.exists(stream.spool_path)
+
+    sink.cleanup()
+
+
+def test_opus_spool_records_roundtrip(tmp_path):
+    from audio.opus_spool import iter_records, pack_record
+
+    path = os.path.join(tmp_path, "stream_1_0.opuspkt")
+
+    with open(path, "wb") as f:
+        f.write(pack_record(65535, 960, 1000.0, b"\xf8\xff\xfe"))
+        f.write(pack_record(0, 1920, 1000.02, b"\x01\x02"))
+        f.write(pack_record(1, 2880, 1000.04, b"\x03")[:-1])  # truncated tail
+
+    records = list(iter_records(path))
+
+    assert [r[0] for r in records] == [65535, 0]
+    assert records[1][3] == b"\x01\x02"
+
+
+def test_opus_decode_conceals_gaps_and_skips_late_packets(monkeypatch):
+    import discord.opus
+    from audio import opus_spool
+
+    frame_bytes = 48000 * 2 * 2 // 50  # 20 ms of 48 kHz stereo int16
+
+    class FakeDecoder:
+        calls = []
+
+        def decode(self, data, fec=False):
+            self.calls.append("plc" if data is None else f"{'fec' if fec else 'pcm'}:{data.decode()}")
+            return b"\x00" * frame_bytes
+
+    monkeypatch.setattr(discord.opus, "Decoder", FakeDecoder)
+
+    def record(seq, wall):
+        return seq, seq * 960, wall, str(seq).encode()
+
+    records = [
+        record(10, 1.00),
+        record(12, 1.04),  # 1 lost: FEC only
+        record(16, 1.12),  # 3 lost: 2 x PLC, then FEC
+        record(16, 1.12),  # duplicate
+        record(15, 1.13),  # arrived after 16
+        record(30, 1.40),  # 13 lost: over the cap, a discontinuity
+        record(31, 1.42),
+    ]
+
+    frames = list(opus_spool.decode_records(records))
+
+    assert FakeDecoder.calls == [
+        "pcm:10",
+        "fec:12", "pcm:12",
+        "plc", "plc", "fec:16", "pcm:16",
+        "pcm:30",
+        "pcm:31",
+    ]
+    assert all(len(pcm) == frame_bytes for pcm, _ in frames)
+
+    # concealed frames fill the gap 20 ms apart, ending right before the received packet
+    walls = [round(wall, 3) for _, wall in frames]
+    assert walls == [1.0, 1.02, 1.04, 1.06, 1.08, 1.1, 1.12, 1.4, 1.42]
+
+
+def test_sink_flushes_early_when_budget_exceeded(tmp_path):
+    from audio.buffers import MemoryBudget
+    from audio.sink import ScribeSink, SinkConfig
+
+    budget = MemoryBudget(limit_bytes=4096)
+    config = SinkConfig(temp_dir=os.path.join(tmp_path, "temp_pcm"), buffer_capacity=16384)
+    sink = ScribeSink(7, config, budget=budget)
+
+    with sink._lock:
+        for _ in range(3):
+            sink._buffer(1, b"\x00" * 2000)
+            sink._apply_flush_policy(1)
+
+    usage = sink.memory_usage()
+    assert usage.streams == 1
+    assert usage.allocated == 16384
+    assert usage.buffered <= 4096
+
+    sink.cleanup()
+    assert budget.usage(7).streams == 0
+
+
+def test_sink_flushes_quiet_users_without_further_writes(tmp_path):
+    import time
+    from audio.sink import ScribeSink, SinkConfig
+
+    config = SinkConfig(
+        temp_dir=os.path.join(tmp_path, "temp_pcm"),
+        spool_codec="pcm",
+        max_buffer_seconds=0.1,
+        sweep_interval=0.02
+    )
+    sink = ScribeSink(8, config)
+
+    with sink._lock:
+        sink._buffer(1, b"\x01" * 3840)
+
+    # no write() after this: only the timer can flush the buffer
+    deadline = time.monotonic() + 5
+    while sink.memory_usage().buffered and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert sink.memory_usage().buffered == 0
+    assert sink.spooler.sync(timeout=5)
+    assert os.path.getsize(sink.open_streams[1]) > 0
+
+    sink.cleanup()
+
+
+
+def test_sink_logs_undecodable_packets(tmp_path, caplog):
+    from types import SimpleNamespace
+    from audio.sink import ScribeSink, SinkConfig
+
+    sink = ScribeSink(8, SinkConfig(temp_dir=os.path.join(tmp_path, "temp_pcm")))
+
+    with caplog.at_level("ERROR", logger="audio.sink"):
+        sink.write(SimpleNamespace(id=1), SimpleNamespace(packet=None))
+
+    assert "decode error for guild 8" in caplog.text
+
+    sink.cleanup()
+
+def test_take_cut_keeps_streams_when_spool_sync_times_out(tmp_path, caplog):
+    import time
+    from audio.sink import ScribeSink, SinkConfig
+
+    config = SinkConfig(
+        temp_dir=os.path.join(tmp_path, "temp_pcm"),
+        spool_codec="pcm",
+        capture_format="native",
+        spool_sync_timeout=0.05,
+        spool_sync_retries=20
+    )
+    sink = ScribeSink(9, config)
+
+    def slow_disk(data):
+        time.sleep(0.3)
+        return data
+
+    sink._format_transform = lambda uid: slow_disk
+
+    with sink._lock:
+        sink._buffer(1, b"\x01" * 3840)
+
+    with caplog.at_level("WARNING", logger="audio.sink"):
+        streams = sink.take_cut()
+
+    assert [s.user_id for s in streams] == [1]
+    assert os.path.getsize(streams[0].spool_path) == 3840
+    assert "still busy" in caplog.text
+
+    sink.cleanup()
+
+
+def test_split_on_silence_cuts_inside_pauses():
+    import numpy as np
+    from audio.silence import split_on_silence
+
+    sr = 16000
+    rng = np.random.default_rng(1)
+
+    def speech(seconds):
+        return rng.normal(0, 0.3, int(seconds * sr)).astype(np.float32)
+
+    def pause(seconds):
+        return np.zeros(int(seconds * sr), dtype=np.float32)
+
+    audio = np.concatenate([speech(70), pause(1), speech(70), pause(1), speech(30)])
+
+    windows = split_on_silence(audio, sr, target_seconds=60, max_seconds=100)
+
+    assert windows[0][0] == 0 and windows[-1][1] == len(audio)
+    assert len(windows) == 3
+    for _, end in windows[:-1]:
+        assert not audio[end - 160:end + 160].any()
+
+
+def _routing_transcriber(fast_segments):
+    """
+    Transcriber with fake tiers: the fast model returns `fast_segments`,
+    the main model one "redone" segment per window.
+    """
+    import threading
+    from types import SimpleNamespace
+
+    import pytest
+    pytest.importorskip("torch")
+    pytest.importorskip("faster_whisper")
+    from audio.transcriber import ModelTier, Transcriber, TranscriberConfig
+
+    class FakeModel:
+        def __init__(self, segments=None):
+            self.segments = segments
+            self.windows = []
+
+        def transcribe(self, audio, language=None, beam_size=1):
+            duration = len(audio) / 16000
+            self.windows.append(len(audio))
+            segments = self.segments
+            if segments is None:
+                segments = [SimpleNamespace(start=0.0, end=duration, text="redone",
+                                            avg_logprob=-0.1, no_speech_prob=0.0)]
+            return iter(segments), SimpleNamespace(duration=duration)
+
+    def seg(start, end, text, logprob):
+        return SimpleNamespace(start=start, end=end, text=text, avg_logprob=logprob, no_speech_prob=0.0)
+
+    transcriber = Transcriber.__new__(Transcriber)
+    transcriber.config = TranscriberConfig(cache_dir=None)
+    transcriber.batched = None
+    transcriber.cache = None
+    transcriber.main_tier = ModelTier("large", FakeModel(), 5)
+    transcriber.fast_tier = ModelTier("small", FakeModel([seg(*s) for s in fast_segments]), 1)
+    transcriber._stats_lock = threading.Lock()
+    transcriber.routed_clips = 0
+    transcriber.escalated_clips = 0
+    return transcriber
+
+
+
+def test_transcript_cache_key_covers_batching_and_chunking():
+    import numpy as np
+    from dataclasses import replace
+
+    transcriber = _routing_transcriber([])
+    transcriber.cache = object()
+    audio = np.zeros(16000, dtype=np.float32)
+
+    base = transcriber._cache_key(audio, routed=False)
+    transcriber.batched = object()
+    batched = transcriber._cache_key(audio, routed=False)
+    transcriber.config = replace(transcriber.config, batch_size=16)
+    rebatched = transcriber._cache_key(audio, routed=False)
+    transcriber.config = replace(transcriber.config, chunk_target_seconds=30.0)
+    rechunked = transcriber._cache_key(audio, routed=False)
+
+    assert len({base, batched, rebatched, rechunked}) == 4
+
+def test_escalation_spans_pad_only_into_gaps():
+    transcriber = _routing_transcriber([])
+    from audio.transcriber import TranscriptSegment
+
+    sr = transcriber.SAMPLE_RATE
+
+    segments = [
+        TranscriptSegment(0.0, 2.0, "a", -0.1),
+        TranscriptSegment(2.0, 3.0, "b", -1.5),
+        TranscriptSegment(3.1, 5.0, "c", -0.1),
+        TranscriptSegment(6.0, 7.0, "d", -1.5),
+        TranscriptSegment(7.1, 8.0, "e", -1.5),
+    ]
+
+    spans = transcriber._escalation_spans(segments, total=10 * sr)
+
+    # "b" sits between two kept segments, so its padding is clipped on both sides;
+    # "d" and "e" are padded into the silence around them and merged
+    assert spans == [(2 * sr, int(3.1 * sr)), (int(5.8 * sr), int(8.2 * sr))]
+
+
+def test_routed_merge_does_not_repeat_boundary_words():
+    import numpy as np
+
+    transcriber = _routing_transcriber([
+        (0.0, 2.0, "a", -0.1),
+        (2.0, 3.0, "b", -1.5),
+        (3.1, 5.0, "c", -0.1),
+    ])
+    audio = np.zeros(10 * 16000, dtype=np.float32)
+
+    segments = transcriber._transcribe_routed(audio)
+
+    assert [s.text for s in segments] == ["a", "redone", "c"]
+    assert transcriber.main_tier.model.windows == [int(3.1 * 16000) - 2 * 16000]
+    assert transcriber.routing_stats()["escalated_clips"] == 1
+
+
+def test_merge_escalated_drops_fast_segments_inside_spans():
+    transcriber = _routing_transcriber([])
+    from audio.transcriber import TranscriptSegment
+
+    kept = TranscriptSegment(0.0, 2.0, "kept", -0.1)
+    overlapping = TranscriptSegment(1.9, 2.5, "overlapping", -0.1)
+    redone = [TranscriptSegment(2.0, 2.5, "redone")]
+
+    merged = transcriber._merge_escalated([kept, overlapping], [(32000, 40000)], [redone])
+
+    assert [s.text for s in merged] == ["kept", "redone"]
+
+
+def test_benchmark_pools_speakers_like_process_cut():
+    import threading
+
+    import pytest
+    pytest.importorskip("torch")
+    pytest.importorskip("faster_whisper")
+    from types import SimpleNamespace
+
+    from audio.transcriber import Transcriber
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    class FakeTranscriber:
+        config = SimpleNamespace(num_workers=2)
+        transcribe_many = Transcriber.transcribe_many
+
+        def transcribe(self, source, cancel_event=None):
+            # both speakers must be in flight at once to get past the barrier
+            barrier.wait()
+            return source.upper()
+
+    assert FakeTranscriber().transcribe_many(["alice", "bob"]) == ["ALICE", "BOB"]
+
+
+def test_autotune_profile_roundtrip_and_apply(tmp_path):
+    import pytest
+    pytest.importorskip("torch")
+    pytest.importorskip("faster_whisper")
+    from audio.autotune import (
+        apply_profile, hardware_key, load_profile, profile_matches, save_profile, word_error_rate
+    )
+    from audio.transcriber import TranscriberConfig
+
+    assert word_error_rate("the cat sat", "the cat sat") == 0.0
+    assert word_error_rate("the cat sat", "the dog sat down") == pytest.approx(2 / 3)
+    assert word_error_rate("", "") == 0.0
+
+    key = hardware_key("cpu")
+    assert key == hardware_key("cpu") and key.endswith("|cpu")
+
+    base = TranscriberConfig()
+    entry = {
+        "compute_type": "int8_float32", "beam_size": 2, "num_workers": 4, "cpu_threads": 3,
+        "model_size": base.model_size, "fast_model_size": base.fast_model_size, "batch_size": base.batch_size,
+    }
+
+    path = str(tmp_path / "profiles" / "whisper.json")
+    save_profile(path, key, entry)
+    save_profile(path, "other-host", {**entry, "num_workers": 1})
+    assert load_profile(path)[key] == entry
+
+    tuned = apply_profile(base, load_profile(path)[key])
+    assert (tuned.compute_type, tuned.beam_size, tuned.num_workers, tuned.cpu_threads) == ("int8_float32", 2, 4, 3)
+    assert tuned.fast_model_size == base.fast_model_size and tuned.batch_size == base.batch_size
+
+    assert profile_matches(entry, base)
+    assert not profile_matches({**entry, "batch_size": 1}, base)
+
+
+def test_autotune_warns_and_keeps_defaults_without_a_clip(tmp_path, caplog):
+    import pytest
+    pytest.importorskip("torch")
+    pytest.importorskip("faster_whisper")
+    from audio.autotune import AutotuneConfig, load_or_tune
+    from audio.transcriber import TranscriberConfig
+
+    base = TranscriberConfig(device="cpu")
+    config = AutotuneConfig(
+        profile_path=str(tmp_path / "whisper.json"),
+        recordings_dir=str(tmp_path / "recordings")
+    )
+
+    with caplog.at_level("WARNING", logger="audio.autotune"):
+        assert load_or_tune(base, config) is base
+
+    assert "No recordings in" in caplog.text
+    assert "autotune skipped" in caplog.text
+
+
+def test_take_cut_fails_after_sync_retries_and_keeps_streams(tmp_path):
+    import threading
+
+    import pytest
+    from audio.sink import ScribeSink, SinkConfig, SpoolSyncTimeout
+
+    config = SinkConfig(
+        temp_dir=os.path.join(tmp_path, "temp_pcm"),
+        spool_codec="pcm",
+        capture_format="native",
+        spool_sync_timeout=0.02,
+        spool_sync_retries=1
+    )
+    sink = ScribeSink(9, config)
+
+    disk = threading.Event()
+    sink._format_transform = lambda uid: lambda data: disk.wait(5) and data
+
+    with sink._lock:
+        sink._buffer(1, b"\x01" * 3840)
+
+    with pytest.raises(SpoolSyncTimeout):
+        sink.take_cut()
+
+    disk.set()
+    streams = sink.take_cut()
+
+    assert [s.user_id for s in streams] == [1]
+    assert os.path.getsize(streams[0].spool_path) == 3840
+
+    sink.cleanup()
+
+def test_prune_guild_spool_keeps_sessions_with_pending_files(tmp_path):
+    from audio.sink import ScribeSink, SinkConfig, guild_spool_dir, prune_guild_spool
+
+    temp_dir = os.path.join(tmp_path, "temp_pcm")
+    config = SinkConfig(temp_dir=temp_dir, spool_codec="pcm", capture_format="native")
+
+    stale = os.path.join(guild_spool_dir(5, temp_dir), "old_run")
+    os.makedirs(stale)
+    open(os.path.join(stale, "stream_1_0.pcm"), "wb").close()
+
+    pending = ScribeSink(5, config)
+    with pending._lock:
+        pending._buffer(1, b"\x01" * 3840)
+    streams = pending.take_cut()
+    pending.cleanup()
+
+    finished = ScribeSink(5, config)
+    os.makedirs(finished.temp_dir, exist_ok=True)
+    finished.cleanup()
+
+    prune_guild_spool(5, temp_dir)
+
+    assert not os.path.exists(stale)
+    assert not os.path.exists(finished.temp_dir)
+    assert os.path.getsize(streams[0].spool_path) == 3840
+
+    streams[0].release()
+    prune_guild_spool(5, temp_dir)
+
+    assert not os.path.exists(pending.temp_dir)
@@ -1,19 +1,25 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
-from bott.commands import join, cut
+from bott.commands import join, cut, summarize
 
 
 @pytest.mark.asyncio
-async def test_join_command(mock_interaction):
+async def test_join_command(mock_interaction, monkeypatch):
     bot = MagicMock()
     mock_interaction.client = bot
     mock_interaction.guild_id = 999
 
     # session manager mock
     bot.session_manager = MagicMock()
+    bot.orchestrator = MagicMock()
+    bot.orchestrator.retire_sink = AsyncMock()
+
+    monkeypatch.setattr(join, "ScribeSink", MagicMock())
+    monkeypatch.setattr(join, "prune_guild_spool", MagicMock())
 
     # voice connect mock
+    mock_interaction.guild.voice_client.disconnect = AsyncMock()
     voice_channel = AsyncMock()
     mock_interaction.user.voice.channel = voice_channel
     voice_client = MagicMock()
@@ -21,6 +27,10 @@ async def test_join_command(mock_interaction):
 
     await join.run(mock_interaction)
 
+    # the old session is stopped and its sink retired before the new one starts
+    bot.orchestrator.stop_session.assert_called_once_with(999)
+    bot.orchestrator.retire_sink.assert_awaited_once_with(999)
+    join.prune_guild_spool.assert_called_once_with(999)
     voice_channel.connect.assert_called_once()
     bot.session_manager.register_sink.assert_called_once()
 
@@ -34,7 +44,7 @@ async def test_cut_command(mock_interaction):
 
     # fake sink
     mock_sink = MagicMock()
-    mock_sink.save_and_clear_buffers.return_value = [(101, "audio.wav")]
+    mock_sink.take_cut.return_value = [(101, "audio.wav")]
 
     bot.session_manager = MagicMock()
     bot.session_manager.get_sink.return_value = mock_sink
@@ -46,3 +56,51 @@ async def test_cut_command(mock_interaction):
 
     bot.orchestrator.process_cut.assert_called_once()
     mock_interaction.followup.send.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_summarize_edits_progress_then_report(mock_interaction):
+    bot = MagicMock()
+    mock_interaction.client = bot
+    mock_interaction.user.voice = None
+
+    status = MagicMock()
+    status.edit = AsyncMock()
+    mock_interaction.followup.send = AsyncMock(return_value=status)
+
+    review = {"title": "Dune", "mark": 9, "speaker": "Alice", "arguments": ["great"]}
+
+    async def fake_summarize(guild_id, user_name, members, on_review=None, on_position=None):
+        await on_position(1)
+        await on_position(None)
+        await on_review(review)
+        return {"reviews": [review]}, "log-1"
+
+    bot.orchestrator.summarize = fake_summarize
+
+    await summarize.run(mock_interaction)
+
+    queued, started, progress, final = status.edit.call_args_list
+    assert "position 2" in queued.kwargs["content"]
+    assert "Analyzing" in started.kwargs["content"]
+    assert "Dune" in progress.kwargs["content"]
+    assert final.kwargs["embed"].fields[0].name.startswith("Dune")
+
+
+@pytest.mark.asyncio
+async def test_summarize_reports_full_queue(mock_interaction):
+    from core.scheduling import QueueFull
+
+    bot = MagicMock()
+    mock_interaction.client = bot
+    mock_interaction.user.voice = None
+
+    status = MagicMock()
+    status.edit = AsyncMock()
+    mock_interaction.followup.send = AsyncMock(return_value=status)
+
+    bot.orchestrator.summarize = AsyncMock(side_effect=QueueFull("llm queue is full"))
+
+    await summarize.run(mock_interaction)
+
+    assert "queue is full" in status.edit.call_args.kwargs["content"]
@@ -0,0 +1,450 @@
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.streaming import StreamingConfig, StreamingTranscriber
+
+
+class FakeSink:
+    def __init__(self, utterances):
+        self.utterances = list(utterances)
+
+    def take_utterances(self, gap, max_length):
+        taken, self.utterances = self.utterances, []
+        return taken
+
+
+def test_streaming_transcribes_in_background_and_drains():
+    guild = MagicMock(id=1)
+    session_manager = MagicMock()
+    session_manager.get_sink.return_value = FakeSink(["a", "b"])
+
+    streaming = StreamingTranscriber(
+        session_manager,
+        handle=lambda g, stream: f"text {stream}",
+        config=StreamingConfig(poll_interval=0.01)
+    )
+    streaming.watch(guild)
+
+    deadline = time.monotonic() + 5
+    results = []
+    while len(results) < 2 and time.monotonic() < deadline:
+        texts, deferred = streaming.drain(guild.id, timeout=1)
+        results += texts
+        assert deferred == []
+
+    assert results == ["text a", "text b"]
+    streaming.close()
+
+
+def test_streaming_defers_when_lagging():
+    guild = MagicMock(id=2)
+    session_manager = MagicMock()
+    session_manager.get_sink.return_value = FakeSink(["late"])
+
+    streaming = StreamingTranscriber(
+        session_manager,
+        handle=lambda g, stream: "never",
+        config=StreamingConfig(poll_interval=0.01, max_lag_seconds=-1)
+    )
+    streaming.watch(guild)
+
+    deadline = time.monotonic() + 5
+    deferred = []
+    while not deferred and time.monotonic() < deadline:
+        _, deferred = streaming.drain(guild.id, timeout=1)
+
+    assert deferred == ["late"]
+    streaming.close()
+
+
+
+def test_streaming_disposes_utterances_deferred_after_unwatch():
+    import threading
+
+    session_manager = MagicMock()
+    session_manager.get_sink.return_value = FakeSink(["slow", "late"])
+    started, gate = threading.Event(), threading.Event()
+    disposed = []
+
+    def handle(guild, stream):
+        started.set()
+        gate.wait(5)
+        return "text"
+
+    streaming = StreamingTranscriber(
+        session_manager,
+        handle=handle,
+        config=StreamingConfig(poll_interval=0.01, max_lag_seconds=0.05),
+        dispose=disposed.append
+    )
+    streaming.watch(MagicMock(id=3))
+    assert started.wait(5)
+
+    # /stop while "late" waits in the queue; it is deferred once dequeued
+    assert streaming.unwatch(3) == []
+    time.sleep(0.1)
+    gate.set()
+
+    deadline = time.monotonic() + 5
+    while not disposed and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert disposed == ["late"]
+    streaming.close()
+
+def test_streaming_drain_does_not_stall_other_guilds():
+    import threading
+
+    sinks = {1: FakeSink(["slow"]), 2: FakeSink([])}
+    session_manager = MagicMock()
+    session_manager.get_sink.side_effect = lambda gid: sinks[gid]
+
+    started, gate = threading.Event(), threading.Event()
+
+    def handle(guild, stream):
+        if guild.id == 1:
+            started.set()
+            gate.wait(5)
+        return f"text {stream}"
+
+    streaming = StreamingTranscriber(
+        session_manager,
+        handle=handle,
+        config=StreamingConfig(poll_interval=0.01, workers=2, drain_timeout=0.2)
+    )
+    streaming.watch(MagicMock(id=1))
+    streaming.watch(MagicMock(id=2))
+    assert started.wait(5)
+
+    # bounded by default while guild 1's utterance is still running
+    assert streaming.drain(1) == ([], [])
+
+    waiting = []
+    drainer = threading.Thread(target=lambda: waiting.append(streaming.drain(1, timeout=5)))
+    drainer.start()
+
+    # guild 2 keeps being polled and transcribed while guild 1 drains
+    sinks[2].utterances.append("fast")
+    deadline = time.monotonic() + 5
+    texts = []
+    while not texts and time.monotonic() < deadline:
+        texts, _ = streaming.drain(2, timeout=0.5)
+
+    assert texts == ["text fast"]
+    assert drainer.is_alive()
+
+    gate.set()
+    drainer.join(5)
+    assert waiting == [(["text slow"], [])]
+    streaming.close()
+
+
+def test_fair_scheduler_orders_by_priority_then_guild():
+    import threading
+    from core.scheduling import FairScheduler, JobCancelled, Priority
+
+    pool = FairScheduler("test", workers=1)
+    gate = threading.Event()
+    started = threading.Event()
+    ran = []
+
+    blocker = pool.submit(0, lambda job: started.set() or gate.wait(5))
+    assert started.wait(5)
+
+    def record(name):
+        return lambda job: ran.append(name)
+
+    pool.submit(1, record("auto-1"), Priority.BACKGROUND)
+    pool.submit(1, record("cut-1a"))
+    pool.submit(1, record("cut-1b"))
+    last = pool.submit(2, record("cut-2"))
+    doomed = pool.submit(3, record("cut-3"))
+
+    assert pool.position(last) == 1
+    assert pool.cancel_guild(3) == 1
+
+    gate.set()
+    pool.submit(9, lambda job: None, Priority.IDLE).future.result(timeout=5)
+
+    assert ran == ["cut-1a", "cut-2", "cut-1b", "auto-1"]
+    assert isinstance(doomed.future.exception(), JobCancelled)
+    assert blocker.wait_time is not None and blocker.service_time is not None
+
+    pool.shutdown()
+
+
+
+def test_fair_scheduler_survives_futures_cancelled_by_the_caller():
+    import threading
+    from core.scheduling import FairScheduler
+
+    pool = FairScheduler("test", workers=1)
+    gate = threading.Event()
+    started = threading.Event()
+
+    blocker = pool.submit(0, lambda job: started.set() or gate.wait(5))
+    assert started.wait(5)
+
+    skipped = pool.submit(1, lambda job: "never")
+    cancelled_twice = pool.submit(1, lambda job: "never")
+    assert skipped.future.cancel() and cancelled_twice.future.cancel()
+    pool.cancel(cancelled_twice)
+
+    gate.set()
+    assert blocker.future.result(timeout=5)
+    assert pool.submit(2, lambda job: "ok").future.result(timeout=5) == "ok"
+    assert skipped.started_at is None
+
+    pool.shutdown()
+
+def test_ai_container_loads_in_background():
+    import threading
+    import pytest
+    from ai.ai_manager import AIContainer, ServiceNotReady, ServiceUnavailable
+
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "whisper"
+
+    def broken():
+        raise RuntimeError("no model")
+
+    services = AIContainer({"transcriber": slow, "analyst": broken})
+    services.start()
+
+    with pytest.raises(ServiceNotReady):
+        services.get("transcriber")
+    assert not services.is_ready("transcriber")
+
+    release.set()
+    assert services.wait("transcriber", timeout=5) == "whisper"
+
+    with pytest.raises(ServiceUnavailable):
+        services.wait("analyst", timeout=5)
+    assert services.status() == {"transcriber": "ready", "analyst": "failed"}
+
+
+def test_rolling_summary_maps_full_chunks_ahead_of_summarize():
+    from ai.engine.chunking import TextChunker
+    from ai.engine.scheduler import InferenceScheduler
+    from core.rolling_summary import RollingSummarizer
+    from core.scheduling import FairScheduler
+
+    class FakeAnalyst:
+        def __init__(self):
+            self.chunker = TextChunker(max_tokens=12, overlap_turns=0, count_tokens=lambda s: len(s.split()))
+            self.mapped = []
+
+        def map_chunks(self, chunks):
+            self.mapped.append(list(chunks))
+            return [f"note{len(c)}" for c in chunks]
+
+        def reduce(self, notes, on_review=None):
+            return {"notes": notes}
+
+        def cached_analysis(self, text, on_review=None):
+            return None
+
+        def store_analysis(self, text, result):
+            pass
+
+    analyst = FakeAnalyst()
+    services = MagicMock()
+    services.is_ready.return_value = True
+    services.get.return_value = analyst
+    services.wait.return_value = analyst
+
+    history = []
+    session_manager = MagicMock()
+    session_manager.get_history.side_effect = lambda gid: list(history)
+
+    transcription = FairScheduler("t", workers=1)
+    llm = InferenceScheduler()
+    rolling = RollingSummarizer(services, session_manager, transcription, llm)
+
+    for i in range(5):
+        history.append(f"[10:00:0{i}] U: a b c")
+        rolling.notify(7)
+        job = rolling._state(7).job
+        if job:
+            job.future.result(timeout=5)
+
+    # each turn is 6 tokens with its newline, so two fill a chunk
+    assert sum(len(batch) for batch in analyst.mapped) == 2
+
+    result = rolling.finish(7)
+    assert len(result["notes"]) == 3
+    assert len(analyst.mapped[-1]) == 1  # a single catch-up chunk
+
+    rolling.close()
+    llm.shutdown()
+    transcription.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cut_overtakes_other_guilds_background_backlog(tmp_path):
+    import asyncio
+    import threading
+
+    from core.orchestrator import ScribeOrchestrator
+    from core.scheduling import Priority
+
+    ran = []
+
+    class FakeTranscriber:
+        def transcribe(self, source, cancel_event=None):
+            ran.append(os.path.basename(source))
+            return "text"
+
+    def wav(name):
+        path = tmp_path / name
+        path.write_bytes(b"")
+        return str(path)
+
+    services = MagicMock()
+    services.wait.return_value = FakeTranscriber()
+
+    guild_a, guild_b = MagicMock(id=1), MagicMock(id=2)
+    sinks = {2: FakeSink([(20, wav("b-stream"))])}
+    session_manager = MagicMock()
+    session_manager.get_sink.side_effect = lambda gid: sinks.get(gid)
+
+    orchestrator = ScribeOrchestrator(
+        services,
+        session_manager,
+        processed_dir=str(tmp_path / "processed"),
+        streaming=StreamingConfig(poll_interval=0.01),
+        transcription_workers=1
+    )
+    pool = orchestrator.transcription_pool
+
+    gate = threading.Event()
+    pool.submit(0, lambda job: gate.wait(5))
+
+    # guild A: a long auto-cut queued at background priority
+    auto_cut = asyncio.create_task(orchestrator.process_cut(
+        guild_a, [(10, wav(f"a{i}")) for i in range(3)], priority=Priority.BACKGROUND
+    ))
+
+    # guild B: a streamed utterance queued behind it
+    orchestrator.start_streaming(guild_b)
+    deadline = time.monotonic() + 5
+    while pool.pending() < 4 and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    assert pool.pending() == 4
+
+    cut = asyncio.create_task(orchestrator.process_cut(guild_b, [(21, wav("b-cut"))]))
+    await asyncio.sleep(0.05)
+    gate.set()
+
+    await asyncio.wait_for(asyncio.gather(cut, auto_cut), 5)
+
+    assert ran == ["b-stream", "b-cut", "a0", "a1", "a2"]
+
+    orchestrator.streaming.close()
+    pool.shutdown()
+
+
+def test_transcription_pool_follows_tuned_worker_count():
+    import threading
+    from types import SimpleNamespace
+
+    from ai.ai_manager import AIContainer
+    from core.orchestrator import ScribeOrchestrator
+
+    release = threading.Event()
+    services = AIContainer({
+        "transcriber": lambda: release.wait(5) and SimpleNamespace(config=SimpleNamespace(num_workers=4))
+    })
+    orchestrator = ScribeOrchestrator(services, MagicMock())
+    pool = orchestrator.transcription_pool
+    assert pool.workers == 2
+
+    services.start()
+    release.set()
+    services.wait("transcriber", timeout=5)
+    assert pool.workers == 4
+
+    # shrinking lets surplus workers finish and exit
+    pool.resize(1)
+    barrier = threading.Barrier(2, timeout=0.5)
+    job = pool.submit(1, lambda job: barrier.wait())
+    pool.submit(2, lambda job: barrier.wait())
+    with pytest.raises(threading.BrokenBarrierError):
+        job.future.result(timeout=5)
+
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_summarize_stores_session_log_off_the_event_loop():
+    import threading
+    from unittest.mock import AsyncMock
+
+    from core.orchestrator import ScribeOrchestrator
+
+    loop_thread = threading.get_ident()
+    threads = []
+
+    class FakeMemory:
+        def find_session_log(self, transcript, analysis):
+            threads.append(threading.get_ident())
+            return None
+
+        def archive_session_log(self, transcript, analysis, user_name):
+            threads.append(threading.get_ident())
+            return "log-1"
+
+    analyst = MagicMock()
+    analyst.smart_summarize.return_value = {"reviews": []}
+
+    services = MagicMock()
+    services.wait_async = AsyncMock(side_effect=lambda name: {"analyst": analyst, "memory": FakeMemory()}[name])
+    session_manager = MagicMock()
+    session_manager.get_history.return_value = ["[00:00:01] Ann: hello"]
+
+    orchestrator = ScribeOrchestrator(services, session_manager, transcription_workers=1)
+
+    result, log_id = await orchestrator.summarize(1, "Ann")
+
+    assert log_id == "log-1"
+    assert len(threads) == 2
+    assert loop_thread not in threads
+
+    orchestrator.transcription_pool.shutdown()
+    orchestrator.llm_scheduler.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_retire_sink_archives_uncut_audio(tmp_path):
+    from audio.sink import ScribeSink, SinkConfig
+    from core.orchestrator import ScribeOrchestrator
+    from core.session_manager import SessionManager
+
+    sink = ScribeSink(4, SinkConfig(
+        temp_dir=str(tmp_path / "temp_pcm"), spool_codec="pcm", capture_format="native"
+    ))
+    with sink._lock:
+        sink._buffer(1, b"\x01" * 3840)
+
+    session_manager = SessionManager()
+    session_manager.register_sink(4, sink)
+
+    orchestrator = ScribeOrchestrator(
+        MagicMock(), session_manager, processed_dir=str(tmp_path / "processed"), transcription_workers=1
+    )
+
+    await orchestrator.retire_sink(4)
+    orchestrator.archive_executor.shutdown(wait=True)
+
+    assert session_manager.get_sink(4) is None
+    assert len(os.listdir(tmp_path / "processed")) == 1
+    assert not os.listdir(sink.temp_dir)
+
+    orchestrator.transcription_pool.shutdown()
+    orchestrator.llm_scheduler.shutdown()
@@ -0,0 +1,321 @@
+import os
+
+from ai.engine.manifest import ModelManifest
+
+
+def test_manifest_resolves_registered_file_without_rehashing(tmp_path):
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"gguf" * 1000)
+
+    manifest = ModelManifest(str(tmp_path / "manifest.json"))
+    entry = manifest.register("repo", "model.gguf", str(model))
+
+    assert entry["size"] == 4000
+    assert ModelManifest(manifest.path).lookup("repo", "model.gguf") == str(model)
+    assert manifest.lookup("repo", "other.gguf") is None
+
+    # a replaced file is not trusted
+    model.write_bytes(b"tampered")
+    assert manifest.lookup("repo", "model.gguf") is None
+
+    os.remove(model)
+    assert manifest.lookup("repo", "model.gguf") is None
+
+
+def test_model_loader_reuses_hf_cache_before_downloading(tmp_path, monkeypatch):
+    import pytest
+
+    pytest.importorskip("llama_cpp")
+    huggingface_hub = pytest.importorskip("huggingface_hub")
+    from ai.engine.config import AnalystConfig
+    from ai.engine.model_loader import ModelLoader
+
+    cached = tmp_path / "hf-cache" / "model.gguf"
+    cached.parent.mkdir()
+    cached.write_bytes(b"gguf" * 1000)
+
+    def not_in_models_dir(**kwargs):
+        if kwargs.get("local_files_only"):
+            raise FileNotFoundError("not in models_dir")
+        raise AssertionError("must not download a model that is already cached")
+
+    monkeypatch.setattr(huggingface_hub, "hf_hub_download", not_in_models_dir)
+    monkeypatch.setattr(huggingface_hub, "try_to_load_from_cache", lambda **kwargs: str(cached))
+
+    config = AnalystConfig(models_dir=str(tmp_path / "models"), manifest_path=str(tmp_path / "manifest.json"))
+    assert ModelLoader(config).resolve() == str(cached)
+
+    # registered, so the next start resolves it from the manifest alone
+    assert ModelManifest(config.manifest_path).lookup(config.repo_id, config.filename) == str(cached)
+
+
+def test_context_pool_keeps_chunk_order():
+    import time
+    import pytest
+
+    pytest.importorskip("llama_cpp")
+    from ai.engine.pool import ContextPool
+
+    class FakeEngine:
+        def generate(self, prompt, max_tokens, cancel_event=None):
+            time.sleep(0.05 if prompt == "a" else 0.0)
+            return prompt.upper()
+
+    pool = ContextPool(FakeEngine(), FakeEngine, size=3)
+
+    assert pool.map(["a", "b", "c", "d"], max_tokens=8) == ["A", "B", "C", "D"]
+    assert len(pool._engines) == 3
+
+
+def test_inference_evaluates_prompt_prefix_once():
+    import pytest
+
+    pytest.importorskip("llama_cpp")
+    from ai.engine.config import AnalystConfig
+    from ai.engine.inference import InferenceEngine
+    from ai.engine.prompts import Prompt
+
+    class FakeLlama:
+        def __init__(self):
+            self.evals = 0
+            self.n_tokens = 0
+            self.input_ids = []
+
+        def tokenize(self, text, add_bos=True, special=False):
+            return ([1] if add_bos else []) + list(text)
+
+        def reset(self):
+            self.n_tokens, self.input_ids = 0, []
+
+        def eval(self, tokens):
+            self.evals += 1
+            self.input_ids = list(tokens)
+            self.n_tokens = len(tokens)
+
+        def save_state(self):
+            return list(self.input_ids)
+
+        def load_state(self, state):
+            self.input_ids, self.n_tokens = list(state), len(state)
+
+        def __call__(self, prompt, **kwargs):
+            self.input_ids, self.n_tokens = list(prompt), len(prompt)
+            return {"choices": [{"text": f"{len(prompt)}"}]}
+
+    llm = FakeLlama()
+    engine = InferenceEngine(llm, AnalystConfig())
+
+    assert engine.generate(Prompt("instr:", "a"), 8) == "8"
+    assert engine.generate(Prompt("instr:", "bb"), 8) == "9"
+    assert llm.evals == 1
+
+
+def test_chunker_packs_whole_turns_with_overlap():
+    from ai.engine.chunking import TextChunker
+
+    turns = [f"[12:00:0{i}] User{i}: " + " ".join(["слово"] * 5) for i in range(6)]
+    text = "\n".join(turns)
+
+    chunker = TextChunker(max_tokens=30, overlap_turns=1, count_tokens=lambda s: len(s.split()))
+    chunks = chunker.split(text)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunker.count_tokens(chunk) <= 30
+        assert all(line in turns for line in chunk.split("\n"))
+
+    # each chunk starts with the last turn of the previous one
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert nxt.split("\n")[0] == prev.split("\n")[-1]
+
+    assert chunks[-1].split("\n")[-1] == turns[-1]
+
+    # a turn over the budget is split, and every piece keeps its speaker header
+    calls = []
+
+    def count(s):
+        calls.append(s)
+        return len(s.split())
+
+    header = "[12:30:00] Alice: "
+    long_turn = header + " ".join(f"w{i}" for i in range(100))
+    chunker = TextChunker(max_tokens=30, overlap_turns=0, count_tokens=count)
+    pieces = chunker.pieces(long_turn)
+    tokenized = len(calls)
+
+    assert len(pieces) > 3
+    assert all(piece.startswith(header) and count(piece) < 30 for piece in pieces)
+    assert " ".join(piece[len(header):] for piece in pieces) == long_turn[len(header):]
+    # the tokenizer runs for the turn, its header and each piece, not per word
+    assert tokenized <= 2 * len(pieces) + 2
+
+
+def test_tree_reduce_merges_until_notes_fit():
+    import pytest
+
+    pytest.importorskip("llama_cpp")
+    from ai.engine.analyst import StructureAnalyst
+    from ai.engine.config import AnalystConfig
+
+    class FakePool:
+        def __init__(self):
+            self.calls = []
+
+        def map(self, prompts, max_tokens):
+            self.calls.append(len(prompts))
+            return ["merged note" for _ in prompts]
+
+    analyst = StructureAnalyst.__new__(StructureAnalyst)
+    analyst.config = AnalystConfig(n_ctx=400, map_n_ctx=400, max_tokens_standard=100, max_tokens_chunk=50)
+    analyst.logger = __import__("logging").getLogger("test")
+    analyst.count_tokens = lambda s: len(s.split()) // 4
+    analyst.map_pool = FakePool()
+
+    notes = [" ".join(["word"] * 200) for _ in range(40)]
+    reduced = analyst._tree_reduce(notes)
+
+    assert analyst._fits_final(reduced)
+    assert len(analyst.map_pool.calls) <= 3
+
+
+def test_reviews_schema_matches_prompt_example():
+    import json
+    import re
+    from ai.engine.prompts import PromptBuilder
+    from ai.engine.schema import REVIEWS_SCHEMA
+
+    prefix = PromptBuilder.main_prefix(is_notes=True)
+    example = json.loads(re.search(r"\{.*\}", prefix.replace("{{", "{").replace("}}", "}"), re.DOTALL).group(0))
+    item = REVIEWS_SCHEMA["properties"]["reviews"]["items"]
+
+    assert set(example["reviews"][0]) == set(item["properties"]) == set(item["required"])
+
+
+def test_incremental_reader_emits_reviews_as_they_close():
+    from ai.engine.parser import IncrementalJSONReader
+
+    text = '{"reviews": [{"title": "Дюна {1}", "arguments": ["a \\"b\\""]}, {"title": "X", "arguments": []}]}'
+    reader = IncrementalJSONReader()
+
+    seen = []
+    for i in range(0, len(text), 7):
+        seen += reader.feed(text[i:i + 7])
+
+    assert [r["title"] for r in seen] == ["Дюна {1}", "X"]
+    assert seen[0]["arguments"] == ['a "b"']
+
+
+def test_inference_scheduler_exposes_cancel_event_to_running_job():
+    import threading
+
+    import pytest
+
+    from ai.engine.scheduler import InferenceScheduler, InferenceSchedulerConfig, current_cancel_event
+    from core.scheduling import JobCancelled, Priority, QueueFull
+
+    scheduler = InferenceScheduler(InferenceSchedulerConfig(workers=1, max_queue=2))
+    started = threading.Event()
+
+    def generate(job):
+        started.set()
+        event = current_cancel_event()
+        assert event is job.cancel_event
+        # stands in for the per-token stopping criteria
+        while not event.wait(0.01):
+            pass
+        raise JobCancelled(job.label)
+
+    running = scheduler.submit(1, generate, label="summarize")
+    assert started.wait(5)
+
+    queued = scheduler.submit(1, lambda job: "late")
+    other = scheduler.submit(2, lambda job: "other")
+    assert scheduler.position(other) == 1
+    with pytest.raises(QueueFull):
+        scheduler.submit(3, lambda job: "rejected")
+
+    assert scheduler.cancel_guild(1) == 2
+    with pytest.raises(JobCancelled):
+        running.future.result(timeout=5)
+    with pytest.raises(JobCancelled):
+        queued.future.result(timeout=5)
+    assert other.future.result(timeout=5) == "other"
+    assert current_cancel_event() is None
+
+    scheduler.shutdown()
+
+
+def test_inference_scheduler_admits_interactive_past_idle_backlog():
+    import threading
+
+    import pytest
+
+    from ai.engine.scheduler import InferenceScheduler, InferenceSchedulerConfig
+    from core.scheduling import Priority, QueueFull
+
+    scheduler = InferenceScheduler(InferenceSchedulerConfig(workers=1, max_queue=2))
+    gate, started = threading.Event(), threading.Event()
+    scheduler.submit(0, lambda job: started.set() or gate.wait(5), Priority.IDLE)
+    assert started.wait(5)
+
+    # background maps of two guilds fill the queue for their own class...
+    scheduler.submit(1, lambda job: "map", Priority.IDLE)
+    scheduler.submit(2, lambda job: "map", Priority.IDLE)
+    with pytest.raises(QueueFull):
+        scheduler.submit(3, lambda job: "map", Priority.IDLE)
+
+    # ...but /summarize is still admitted and runs first
+    summary = scheduler.submit(4, lambda job: "summary", Priority.INTERACTIVE)
+    assert scheduler.position(summary) == 0
+
+    gate.set()
+    assert summary.future.result(timeout=5) == "summary"
+    scheduler.shutdown()
+
+
+def test_truncated_analysis_keeps_completed_reviews():
+    import pytest
+
+    pytest.importorskip("llama_cpp")
+    from ai.engine.analyst import StructureAnalyst
+    from ai.engine.config import AnalystConfig
+
+    raw = '{"reviews": [{"title": "A", "arguments": []}, {"title": "B", "argu'
+
+    class FakeInference:
+        def generate_json(self, prompt, max_tokens, grammar):
+            return raw, None
+
+    analyst = StructureAnalyst.__new__(StructureAnalyst)
+    analyst.config = AnalystConfig(structured_output=True)
+    analyst.logger = __import__("logging").getLogger("test")
+    analyst.inference = FakeInference()
+
+    assert analyst._analyze("text") == {"reviews": [{"title": "A", "arguments": []}]}
+
+
+def test_truncated_streaming_analysis_returns_streamed_reviews():
+    import pytest
+
+    pytest.importorskip("llama_cpp")
+    from ai.engine.analyst import StructureAnalyst
+    from ai.engine.config import AnalystConfig
+    from ai.engine.parser import JSONParser
+
+    raw = '{"reviews": [{"title": "A", "arguments": []}, {"title": "B", "argu'
+
+    class FakeInference:
+        def stream(self, prompt, max_tokens, grammar):
+            for i in range(0, len(raw), 5):
+                yield raw[i:i + 5]
+
+    analyst = StructureAnalyst.__new__(StructureAnalyst)
+    analyst.config = AnalystConfig(structured_output=False)
+    analyst.logger = __import__("logging").getLogger("test")
+    analyst.inference = FakeInference()
+    analyst.parser = JSONParser()
+
+    seen = []
+    result = analyst._analyze("text", on_review=seen.append)
+
+    assert result == {"reviews": seen} == {"reviews": [{"title": "A", "arguments": []}]}
@@ -1,5 +1,5 @@
 import pytest
-from bott.embeds import create_session_report_embed
+from bott.embeds import create_session_report_embed, format_review_progress
 
 
 SAMPLE_ANALYSIS = {
@@ -37,4 +37,13 @@ def test_empty_analysis():
 
 def test_embed_fields_exist():
     embed = create_session_report_embed(SAMPLE_ANALYSIS, ["User"], "1")
-    assert len(embed.fields) == 1
\ No newline at end of file
+    assert len(embed.fields) == 1
+
+def test_missing_mark_renders_as_dash():
+    analysis = {"reviews": [{"title": "Dune", "mark": None, "speaker": "Alice", "arguments": []}]}
+
+    embed = create_session_report_embed(analysis, ["Alice"], "1")
+    progress = format_review_progress(analysis["reviews"])
+
+    assert embed.fields[0].name == "Dune (-/10)"
+    assert "(-/10)" in progress and "None" not in progress
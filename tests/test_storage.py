@@ -0,0 +1,42 @@
+from storage.cache import DiskCache
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=60)
+
+    cache.put("a", "x" * 20)
+    cache.put("b", "y" * 20)
+    assert cache.get("a") == "x" * 20  # refresh "a"
+
+    cache.put("c", "z" * 20)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.get("b") is None
+
+    stats = cache.stats
+    assert stats.evictions == 1
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    key = DiskCache.key("model", b"\x00\x01")
+    DiskCache(str(tmp_path)).put(key, [{"text": "hi"}])
+
+    assert DiskCache(str(tmp_path)).get(key) == [{"text": "hi"}]
+
+
+def test_disk_cache_expires_old_entries(tmp_path):
+    import os
+    import time
+
+    cache = DiskCache(str(tmp_path), max_age=60)
+    cache.put("old", 1)
+    cache.put("new", 2)
+
+    stale = time.time() - 120
+    os.utime(tmp_path / "old.json", (stale, stale))
+
+    assert cache.get("old") is None
+    assert cache.get("new") == 2
+    assert "old" not in DiskCache(str(tmp_path), max_age=60)